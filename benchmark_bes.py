@@ -0,0 +1,225 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  version 2 as published by the Free Software Foundation.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+"""
+End-to-end benchmark of BES import, run it by Blender in background mode:
+
+    blender -b -P benchmark_bes.py -- [--sizes 10 100 1000] [--vertices 256]
+                                      [--corpus DIR ...] [--repeat 3]
+                                      [--output bench_bes.json]
+
+Synthetic BES files with given number of objects (--sizes) are generated into
+temporary directory, sample BES files are taken from --corpus directories.
+Every corpus is imported --repeat times into empty scene and wall time of every
+import phase, number of created datablocks and memory usage are written into
+JSON file.
+"""
+
+import os
+import sys
+import json
+import time
+import struct
+import argparse
+import tempfile
+import numpy
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import import_bes
+
+def block(label, payload):
+    return struct.pack("<II", label, len(payload) + 8) + payload
+
+def name_data(name):
+    data = name.encode("ascii") + b"\0"
+    return struct.pack("<I", len(data)) + data
+
+def synthetic_mesh(grid, material):
+    """ Return Mesh block of flat grid (grid x grid vertices) with single UV channel """
+    (x, y) = numpy.meshgrid(numpy.arange(grid, dtype=numpy.float32),
+                            numpy.arange(grid, dtype=numpy.float32))
+    vertices = numpy.zeros((grid * grid, 8), dtype="<f4")
+    vertices[:, 0] = x.ravel()
+    vertices[:, 1] = y.ravel()
+    vertices[:, 5] = 1.0
+    vertices[:, 6] = x.ravel() / (grid - 1)
+    vertices[:, 7] = y.ravel() / (grid - 1)
+
+    quads = numpy.arange(grid * grid, dtype="<u4").reshape(grid, grid)[:-1, :-1].ravel()
+    faces = numpy.empty((len(quads) * 2, 3), dtype="<u4")
+    faces[0::2] = numpy.stack([quads, quads + 1, quads + grid + 1], axis=1)
+    faces[1::2] = numpy.stack([quads, quads + grid + 1, quads + grid], axis=1)
+
+    flags = import_bes.BESVertex.Flags.XYZ | import_bes.BESVertex.Flags.Normal | \
+            import_bes.BESVertex.Flags.Tex1
+    return block(import_bes.BES.BlockID.Mesh,
+                 struct.pack("<I", material) +
+                 block(import_bes.BES.BlockID.Vertices,
+                       struct.pack("<III", len(vertices), 32, flags) + vertices.tobytes()) +
+                 block(import_bes.BES.BlockID.Faces,
+                       struct.pack("<I", len(faces)) + faces.tobytes()))
+
+def synthetic_object(name, children, model = b"", extra = b""):
+    return block(import_bes.BES.BlockID.Object,
+                 struct.pack("<I", len(children)) + name_data(name) +
+                 b"".join(children) + model + extra)
+
+def synthetic_model(meshes, location):
+    transformation = struct.pack("<9f", *location, 0.0, 0.0, 0.0, 1.0, 1.0, 1.0) + bytes(64)
+    return block(import_bes.BES.BlockID.Model,
+                 struct.pack("<I", len(meshes)) + b"".join(meshes) +
+                 block(import_bes.BES.BlockID.Properties, b"\0") +
+                 block(import_bes.BES.BlockID.Transformation, transformation))
+
+def synthetic_pteromat(name, texture):
+    name = name.encode("ascii") + b"\0"
+    texture = texture.encode("ascii") + b"\0"
+    ground = 1 << import_bes.BESPteroMat.Texture.Ground
+    return block(import_bes.BES.BlockID.PteroMat,
+                 struct.pack("<II4sI4sI", 2, ground, b"DD\0\0", 0, bytes(4), len(name)) + name +
+                 struct.pack("<II", ground, len(texture)) + texture)
+
+def write_synthetic_bes(path, objects, vertices, materials = 4):
+    """ Write BES file with given number of objects, each with single grid mesh """
+    grid = max(2, int(round(vertices ** 0.5)))
+    mesh_data = [synthetic_mesh(grid, mat) for mat in range(materials)]
+    children = [synthetic_object("obj{:06d}".format(idx), [],
+                                 synthetic_model([mesh_data[idx % materials]], (idx * grid, 0.0, 0.0)))
+                for idx in range(objects)]
+
+    mats = [synthetic_pteromat("mat{}".format(mat), "tex{}.dds".format(mat)) for mat in range(materials)]
+    material = block(import_bes.BES.BlockID.Material, struct.pack("<I", materials) + b"".join(mats))
+    root = synthetic_object("root", [synthetic_object("scene", children)], extra = material)
+
+    with open(path, "wb") as f:
+        f.write(import_bes.BES.Header.sig + import_bes.BES.Header.vers[0] + bytes(8))
+        f.write(bytes(import_bes.BESPreview.size))
+        f.write(root)
+        f.write(block(import_bes.BES.BlockID.UserInfo, bytes(0x104)))
+
+def memory_usage():
+    """ Return resident memory size of Blender process in bytes (or None if unknown) """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def clear_data():
+    """ Remove all objects and datablocks made by previous import """
+    # Every run measures parsing too, so files parsed by previous runs are dropped
+    import_bes.bes_cache.clear()
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj, do_unlink=True)
+    # Groups made by previous imports are removed too, so repeated imports get the same prefix
+    for collection in (bpy.data.groups, bpy.data.meshes, bpy.data.materials, bpy.data.textures,
+                       bpy.data.images):
+        for item in list(collection):
+            collection.remove(item)
+
+def datablock_counts():
+    return {
+        "objects"  : len(bpy.data.objects),
+        "groups"   : len(bpy.data.groups),
+        "meshes"   : len(bpy.data.meshes),
+        "materials": len(bpy.data.materials),
+        "textures" : len(bpy.data.textures),
+        "images"   : len(bpy.data.images),
+        "vertices" : sum(len(mesh.vertices) for mesh in bpy.data.meshes),
+        "polygons" : sum(len(mesh.polygons) for mesh in bpy.data.meshes),
+    }
+
+def run_import(directory, files):
+    """ Import BES files into empty scene and return measured values """
+    clear_data()
+    rss_before = memory_usage()
+
+    start = time.perf_counter()
+    bpy.ops.import_mesh.bes(directory=directory, files=[{"name": f} for f in files])
+    total = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bpy.context.scene.update()
+    scene_update = time.perf_counter() - start
+
+    times = dict(import_bes.last_import_times)
+    times["total"] = total
+    times["scene_update"] = scene_update
+
+    return {
+        "times" : times,
+        "counts": datablock_counts(),
+        "memory": {"rss_before": rss_before, "rss_after": memory_usage()},
+    }
+
+def bench_corpus(name, directory, files, repeat):
+    size = sum(os.path.getsize(os.path.join(directory, f)) for f in files)
+    runs = []
+    for idx in range(repeat):
+        run = run_import(directory, files)
+        run.update({"corpus": name, "files": len(files), "size_bytes": size, "repeat": idx})
+        runs.append(run)
+        print("{}: {:.3f} s ({} objects)".format(name, run["times"]["total"], run["counts"]["objects"]))
+    return runs
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark BES import in background Blender")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10, 100, 1000],
+                        help="Number of objects in synthetic BES files")
+    parser.add_argument("--vertices", type=int, default=256,
+                        help="Number of vertices of every synthetic mesh")
+    parser.add_argument("--corpus", nargs="*", default=[],
+                        help="Directories with sample BES files")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Number of imports of every corpus")
+    parser.add_argument("--output", default="bench_bes.json",
+                        help="Output JSON file")
+    args = parser.parse_args(argv)
+
+    if not hasattr(bpy.ops.import_mesh, "bes"):
+        import_bes.register()
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in args.sizes:
+            fname = "synthetic_{}.bes".format(size)
+            write_synthetic_bes(os.path.join(tmp_dir, fname), size, args.vertices)
+            runs.extend(bench_corpus("synthetic-{}".format(size), tmp_dir, [fname], args.repeat))
+
+    for directory in args.corpus:
+        files = sorted(f for f in os.listdir(directory) if f.lower().endswith(".bes"))
+        if files:
+            runs.extend(bench_corpus(os.path.basename(os.path.normpath(directory)),
+                                     directory, files, args.repeat))
+
+    results = {
+        "blender" : bpy.app.version_string,
+        "vertices": args.vertices,
+        "runs"    : runs,
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print("Results written into {}".format(args.output))
+
+if __name__ == "__main__":
+    main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else [])
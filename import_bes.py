@@ -16,12 +16,20 @@
 # ##### END GPL LICENSE BLOCK #####
 
 import os
+import json
+import hashlib
 import struct
+import zlib
+import time
 import bpy
+import bpy.utils.previews
 import functools
+import collections
+import concurrent.futures
+import numpy
 from bpy_extras.io_utils import ImportHelper
-from bpy.props import StringProperty, CollectionProperty, IntProperty, BoolProperty
-from mathutils import Euler, Vector
+from bpy.props import StringProperty, CollectionProperty, IntProperty, BoolProperty, EnumProperty, PointerProperty, FloatProperty, FloatVectorProperty
+from mathutils import Euler
 
 bl_info = {
     "name"       : "Vietcong BES (.bes)",
@@ -49,12 +57,80 @@ class BESObject(object):
         self.translation = (0.0, 0.0, 0.0)
         self.rotation    = (0.0, 0.0, 0.0)
         self.scale       = (1.0, 1.0, 1.0)
+        # Child indices from root object joined by '/' (root object has empty path)
+        self.path = ""
+        # Blocks which are not decoded, kept for lossless round-trip (list of BESBlock)
+        self.raw_blocks = []
+        # World bounds of object meshes and all its children (see BES.compute_bounds)
+        self.bounds = None
+
+    def walk(self):
+        """ Yield this object and all its descendants (parents before children) """
+        pending = [self]
+        while pending:
+            obj = pending.pop()
+            yield obj
+            pending.extend(reversed(obj.children))
+
+    def matrix(self):
+        """ Return 4x4 numpy matrix of object transformation (scale, XYZ Euler rotation, translation) """
+        (cx, cy, cz) = numpy.cos(self.rotation)
+        (sx, sy, sz) = numpy.sin(self.rotation)
+        rot_x = numpy.array([[1.0, 0.0, 0.0], [0.0,  cx, -sx], [0.0,  sx,  cx]])
+        rot_y = numpy.array([[ cy, 0.0,  sy], [0.0, 1.0, 0.0], [-sy, 0.0,  cy]])
+        rot_z = numpy.array([[ cz, -sz, 0.0], [ sz,  cz, 0.0], [0.0, 0.0, 1.0]])
+
+        matrix = numpy.identity(4)
+        matrix[:3, :3] = rot_z.dot(rot_y).dot(rot_x) * numpy.array(self.scale)
+        matrix[:3, 3] = self.translation
+        return matrix
 
 class BESMesh(object):
     def __init__(self, vertices, faces, material):
         self.vertices = vertices
         self.faces = faces
         self.material = material
+        # Raw Mesh block, if mesh was parsed from BES file
+        self.data = None
+        # Axis aligned bounds of vertices (2x3 array of minimum and maximum) in local and world space
+        self.bounds = None
+        self.world_bounds = None
+
+    def hash(self):
+        """ Return checksum of raw Mesh block (None for meshes not parsed from BES file) """
+        return "{:08x}".format(zlib.crc32(self.data)) if self.data is not None else None
+
+class BESBlock(object):
+    """ Raw block which is not decoded, its payload is referenced without copying """
+    def __init__(self, label, offset, data):
+        self.label = label
+        # Label of block containing this one (0 for top-level blocks)
+        self.parent = 0
+        # Offset of block payload in BES file
+        self.offset = offset
+        # Memoryview of block payload into source buffer
+        self.data = data
+
+    def ref(self):
+        """ Return compact reference to block payload - (label, parent, offset, size) """
+        return (self.label, self.parent, self.offset, len(self.data))
+
+def coords_bounds(coords):
+    """ Return (minimum, maximum) of vertex coords, or None if there are no vertices """
+    return (coords.min(axis=0), coords.max(axis=0)) if len(coords) > 0 else None
+
+def faces_max(faces):
+    """ Return maximal vertex index used by faces, or -1 if there are no faces """
+    return int(faces.max()) if len(faces) > 0 else -1
+
+def path_prefixes(path):
+    """ Return paths of object and all its ancestors (see BESObject.path) """
+    parts = path.split("/") if path else []
+    return ["/".join(parts[:idx]) for idx in range(len(parts) + 1)]
+
+def buffer_address(data):
+    """ Return memory address of buffer (memoryview slices of one buffer differ by their offset) """
+    return numpy.frombuffer(data, dtype=numpy.uint8).__array_interface__["data"][0]
 
 class BESVertex(object):
     class Flags:
@@ -75,10 +151,16 @@ class BESVertex(object):
         TexcountShift = 8
         TexcountMax   = 8
 
-    def __init__(self, coords, normals, uv = []):
-        self.coords = coords
-        self.normals = normals
-        self.uv = uv
+    @staticmethod
+    def dtype(size, texCnt):
+        """
+        Return numpy record type of single vertex with fields 'coords', 'normals' and 'uv'.
+        Only first 'texCnt' UV coords are mapped, the rest of vertex 'size' is skipped.
+        """
+        return numpy.dtype({"names"   : ["coords", "normals", "uv"],
+                            "formats" : [("<f4", 3), ("<f4", 3), ("<f4", (texCnt, 2))],
+                            "offsets" : [0, 12, 24],
+                            "itemsize": size})
 
 class BESMaterial(object):
     NoneMaterial = 0xFFFFFFFF
@@ -88,6 +170,12 @@ class BESMaterial(object):
     def __init__(self, transparency, textures):
         self.transparent = transparency
         self.textures = textures
+        # Raw material block, if material was parsed from BES file
+        self.data = None
+
+    def hash(self):
+        """ Return checksum of raw material block (None for materials not parsed from BES file) """
+        return "{:08x}".format(zlib.crc32(self.data)) if self.data is not None else None
 
 class BESBitmap(BESMaterial):
     class Texture:
@@ -130,6 +218,8 @@ class BESTexture(object):
         self.blend_type = blend_type
         self.file_name = file_name
         self.uv_order = uv_order
+        # UV channel hint stored with texture, only trusted when UV data agree
+        self.coord = 0
 
 class BESTextureDiffuse(BESTexture):
     def __init__(self, file_name, uv_order):
@@ -147,6 +237,27 @@ class BESTextureUnknown(BESTexture):
     def __init__(self, file_name, uv_order):
         super().__init__(False, 'MIX', file_name, uv_order)
 
+class BESPreview(object):
+    """ Preview image stored right after BES header (64x64 pixels, 24-bit BGR) """
+    width  = 64
+    height = 64
+    size   = 0x3000
+
+    def __init__(self, data):
+        if len(data) != BESPreview.size:
+            raise BESError("Preview size mismatch")
+        self.data = data
+
+    def rgba(self):
+        """
+        Decode preview into flat list of RGBA floats.
+        Rows are ordered from bottom to top, as Blender images and previews expect.
+        """
+        bgr = numpy.frombuffer(self.data, dtype=numpy.uint8).reshape(BESPreview.height, BESPreview.width, 3)
+        rgba = numpy.ones((BESPreview.height, BESPreview.width, 4), dtype=numpy.float32)
+        rgba[:, :, :3] = bgr[::-1, :, ::-1] / 255.0
+        return rgba.ravel().tolist()
+
 class BES(object):
     class Header:
         sig = b'BES\x00'
@@ -173,25 +284,104 @@ class BES(object):
         ReqSingle   = 2  # <1;1>
         ReqMultiple = 3  # <1;N>
 
-    def __init__(self, fname):
+    class ImportMode:
+        Full       = "FULL"        # Everything
+        Hierarchy  = "HIERARCHY"   # Objects, transformations and meshes without geometry
+        NoUV       = "NO_UV"       # Everything except UV mapping
+        Materials  = "MATERIALS"   # Materials only, models are skipped
+        NoTextures = "NO_TEXTURES" # Everything, but textures are not loaded
+        Tree       = "TREE"        # Object names and hierarchy only, walked by block headers
+
+    # Blocks whose payload is skipped (not decoded at all) in given import mode
+    SkipBlocks = {
+        ImportMode.Full       : frozenset(),
+        ImportMode.Hierarchy  : frozenset([BlockID.Vertices, BlockID.Faces, BlockID.Material]),
+        ImportMode.NoUV       : frozenset(),
+        ImportMode.Materials  : frozenset([BlockID.Model]),
+        ImportMode.NoTextures : frozenset(),
+        ImportMode.Tree       : frozenset([BlockID.Model, BlockID.Material]),
+    }
+
+    # Number of vertices/faces checked by single job when parsing in parallel
+    ParallelChunk = 0x10000
+
+    def __init__(self, fname, preview_only = False, mode = ImportMode.Full, threads = 1,
+                 selection = None):
+        """
+        Open and parse BES file. When 'preview_only' is set, only header and
+        preview image are read and model data are left untouched.
+        Import 'mode' says which parts of model are decoded (see BES.ImportMode).
+        With more 'threads', large meshes are checked (and measured) in parallel.
+        When 'selection' (set of object paths) is given, only subtrees of these objects
+        are parsed, their ancestors are kept without meshes and the rest is skipped.
+        """
+        self.path = fname
+        self.threads = threads
+        self.executor = None
+        self.jobs = []
+        self.parallel_meshes = []
         self.objects = []
+        self.preview = None
+        self.mode_skip_blocks = BES.SkipBlocks[mode]
+        self.skip_blocks = self.mode_skip_blocks
+        self.read_uv = mode != BES.ImportMode.NoUV
+        self.selection = selection
+        self.selection_parents = set()
+        for path in selection or []:
+            self.selection_parents.update(path_prefixes(path))
+        # Paths and numbers of parsed children of objects being parsed
+        self.object_stack = []
+        self.block_handlers = {
+            BES.BlockID.Object         : self.parse_block_object,
+            BES.BlockID.Model          : self.parse_block_model,
+            BES.BlockID.Mesh           : self.parse_block_mesh,
+            BES.BlockID.Vertices       : self.parse_block_vertices,
+            BES.BlockID.Faces          : self.parse_block_faces,
+            BES.BlockID.Properties     : self.parse_block_properties,
+            BES.BlockID.Transformation : self.parse_block_transformation,
+            BES.BlockID.Unk36          : self.parse_block_unk36,
+            BES.BlockID.Unk38          : self.parse_block_unk38,
+            BES.BlockID.UserInfo       : self.parse_block_user_info,
+            BES.BlockID.Material       : self.parse_block_material,
+            BES.BlockID.Bitmap         : self.parse_block_bitmap,
+            BES.BlockID.PteroMat       : self.parse_block_pteromat,
+        }
         try:
             self.f = open(fname, "rb")
         except Exception as e:
             raise BESError(str(e))
 
-        self.read_header()
-        self.read_preview()
-        self.read_data()
+        try:
+            self.read_header()
+            self.read_preview()
+            if preview_only:
+                pass
+            elif mode == BES.ImportMode.Tree:
+                self.read_tree()
+            else:
+                self.read_data()
+        finally:
+            self.f.close()
+
+    def mesh_map(self):
+        """ Return dict mapping (object path, mesh ID) to tuples (root object, BESObject, BESMesh) """
+        return {(obj.path, mesh_id): (root, obj, mesh)
+                for root in self.objects for obj in root.walk()
+                for (mesh_id, mesh) in enumerate(obj.meshes)}
 
     def unpack(self, fmt, data):
         st_fmt = fmt
         st_len = struct.calcsize(st_fmt)
         st_unpack = struct.Struct(st_fmt).unpack_from
+        # Truncated files and blocks are reported like any other BES error
+        if len(data) < st_len:
+            raise BESError("Data out of bounds")
         return st_unpack(data[:st_len])
 
     def read_header(self):
         data = self.f.read(0x10)
+        if len(data) != 0x10:
+            raise BESError("BES header out of bounds")
         (sig, ver, unk1, unk2) = self.unpack("<4s4sII", data)
 
         if sig != BES.Header.sig:
@@ -203,51 +393,95 @@ class BES(object):
         return ver
 
     def read_preview(self):
-        self.f.read(0x3000)
+        # Keep raw data only, preview is decoded on request by BESPreview.rgba
+        data = self.f.read(BESPreview.size)
+        if len(data) != BESPreview.size:
+            raise BESError("Preview out of bounds")
+        self.preview = BESPreview(data)
 
     def read_data(self):
-        data = self.f.read()
-        self.parse_data(data)
+        # Blocks are passed around as memoryview slices, so no data are copied while parsing
+        self.data_start = self.f.tell()
+        data = memoryview(self.f.read())
+        self.data_address = buffer_address(data)
+
+        if self.threads <= 1:
+            self.parse_data(data)
+            return
+
+        # Meshes are checked by chunks in thread pool while the rest of file is parsed
+        with concurrent.futures.ThreadPoolExecutor(max_workers = self.threads) as self.executor:
+            try:
+                self.parse_data(data)
+                for (mesh, bounds, maxima) in self.parallel_meshes:
+                    self.finish_mesh(mesh, [job.result() for job in bounds], [job.result() for job in maxima])
+            finally:
+                for job in self.jobs:
+                    job.cancel()
+        self.executor = None
+        self.jobs = []
+        self.parallel_meshes = []
+
+    def read_tree(self):
+        """
+        Read names and hierarchy of objects only. Blocks are walked by their headers
+        in file and payloads of all other blocks are jumped over without reading.
+        """
+        start = self.f.tell()
+        end = self.f.seek(0, os.SEEK_END)
+        for (label, offset, size) in self.tree_blocks(start, end):
+            if label == BES.BlockID.Object:
+                self.objects.append(self.read_tree_object(offset, size, ""))
+
+    def tree_blocks(self, start, end):
+        """ Yield tuples (label, payload offset, payload size) of blocks in given range of file """
+        while end - start > 8:
+            self.f.seek(start)
+            (label, size) = self.unpack("<II", self.f.read(8))
+            if size < 8 or start + size > end:
+                raise BESError("Invalid size of block {:04X}".format(label))
+            yield (label, start + 8, size - 8)
+            start += size
+
+    def read_tree_object(self, offset, size, path):
+        """ Read Object block at given file offset and return BESObject without models """
+        self.f.seek(offset)
+        if size < 8:
+            raise BESError("Block header out of bounds")
+        (children, name_size) = self.unpack("<II", self.f.read(8))
+        if 8 + name_size > size:
+            raise BESError("Object name out of bounds")
+        (name,) = self.unpack("<" + str(name_size) + "s", self.f.read(name_size))
+
+        obj = BESObject(str(name, 'ascii').strip(chr(0)))
+        obj.path = path
+        for (label, child_offset, child_size) in self.tree_blocks(offset + 8 + name_size, offset + size):
+            if label == BES.BlockID.Object:
+                child_path = "{}/{}".format(path, len(obj.children)) if path else str(len(obj.children))
+                obj.children.append(self.read_tree_object(child_offset, child_size, child_path))
+
+        if len(obj.children) != children:
+            raise BESError("Number of object children does not match")
+        return obj
 
     def parse_data(self, data):
         res = self.parse_blocks({BES.BlockID.Object   : BES.BlockPresence.ReqSingle,
                                  BES.BlockID.UserInfo : BES.BlockPresence.ReqSingle},
                                 data)
-        self.objects.append(res[BES.BlockID.Object])
+        root = res[BES.BlockID.Object]
+        root.raw_blocks.append(res[BES.BlockID.UserInfo])
+        self.objects.append(root)
 
-    def parse_block_desc(self, data):
-        return self.unpack("<II", data)
+    def parse_block_desc(self, data, start = 0):
+        if len(data) - start < 8:
+            raise BESError("Block header out of bounds")
+        return struct.unpack_from("<II", data, start)
 
     def parse_block_by_label(self, label, data):
         try:
-            if   label == BES.BlockID.Object:
-                return self.parse_block_object(data)
-            elif label == BES.BlockID.Model:
-                return self.parse_block_model(data)
-            elif label == BES.BlockID.Mesh:
-                return self.parse_block_mesh(data)
-            elif label == BES.BlockID.Vertices:
-                return self.parse_block_vertices(data)
-            elif label == BES.BlockID.Faces:
-                return self.parse_block_faces(data)
-            elif label == BES.BlockID.Properties:
-                return self.parse_block_properties(data)
-            elif label == BES.BlockID.Transformation:
-                return self.parse_block_transformation(data)
-            elif label == BES.BlockID.Unk36:
-                return self.parse_block_unk36(data)
-            elif label == BES.BlockID.Unk38:
-                return self.parse_block_unk38(data)
-            elif label == BES.BlockID.UserInfo:
-                return self.parse_block_user_info(data)
-            elif label == BES.BlockID.Material:
-                return self.parse_block_material(data)
-            elif label == BES.BlockID.Bitmap:
-                return self.parse_block_bitmap(data)
-            elif label == BES.BlockID.PteroMat:
-                return self.parse_block_pteromat(data)
-            else:
+            if label not in self.block_handlers:
                 raise BESError("Unknown block")
+            return self.block_handlers[label](data)
         except BESError as e:
             raise BESError("{:04X}->{}".format(label, e.msg))
 
@@ -262,17 +496,25 @@ class BES(object):
 
         # Search for all blocks
         start = 0
-        while len(data[start:]) > 8:
-            (label, size) = self.parse_block_desc(data[start:])
+        while len(data) - start > 8:
+            (label, size) = self.parse_block_desc(data, start)
 
-            if label in blocks:
-                subblock = data[start + 8: start + size]
+            if size < 8 or start + size > len(data):
+                raise BESError("Invalid size of block {:04X}".format(label))
 
-                if blocks[label] == BES.BlockPresence.OptSingle or blocks[label] == BES.BlockPresence.ReqSingle:
+            if label in blocks:
+                single = blocks[label] == BES.BlockPresence.OptSingle or \
+                         blocks[label] == BES.BlockPresence.ReqSingle
+                if single:
                     blocks.pop(label)
-                    ret[label] = self.parse_block_by_label(label, subblock)
-                else:
-                    ret[label].append(self.parse_block_by_label(label, subblock))
+
+                # Payload of skipped blocks is jumped over by its size without decoding
+                if label not in self.skip_blocks:
+                    subblock = data[start + 8: start + size]
+                    if single:
+                        ret[label] = self.parse_block_by_label(label, subblock)
+                    else:
+                        ret[label].append(self.parse_block_by_label(label, subblock))
             else:
                 raise BESError("Unexpected block {:04X} in this location".format(label))
             start += size
@@ -294,21 +536,46 @@ class BES(object):
         (name,) = self.unpack("<" + str(name_size) + "s", data[8:])
         name = str(name, 'ascii').strip(chr(0))
 
-        model = BESObject(name)
+        path = ""
+        if self.object_stack:
+            parent = self.object_stack[-1]
+            path = "{}/{}".format(parent[0], parent[1]) if parent[0] else str(parent[1])
+            parent[1] += 1
 
-        res = self.parse_blocks({BES.BlockID.Object         : BES.BlockPresence.OptMultiple,
-                                 BES.BlockID.Model          : BES.BlockPresence.OptSingle,
-                                 BES.BlockID.Properties     : BES.BlockPresence.OptSingle,
-                                 BES.BlockID.Transformation : BES.BlockPresence.OptSingle,
-                                 BES.BlockID.Unk38          : BES.BlockPresence.OptSingle,
-                                 BES.BlockID.Material       : BES.BlockPresence.OptSingle},
-                                data[8 + name_size:])
+        # Objects outside of selection are skipped with all their children,
+        # ancestors of selected objects are parsed without meshes
+        selected = self.selection is None or \
+                   any(prefix in self.selection for prefix in path_prefixes(path))
+        if not selected and path and path not in self.selection_parents:
+            return None
+
+        model = BESObject(name)
+        model.path = path
+
+        skip_blocks = self.skip_blocks
+        if selected:
+            self.skip_blocks = self.mode_skip_blocks
+        else:
+            self.skip_blocks = self.mode_skip_blocks | {BES.BlockID.Mesh}
+        self.object_stack.append([path, 0])
+        try:
+            res = self.parse_blocks({BES.BlockID.Object         : BES.BlockPresence.OptMultiple,
+                                     BES.BlockID.Model          : BES.BlockPresence.OptSingle,
+                                     BES.BlockID.Properties     : BES.BlockPresence.OptSingle,
+                                     BES.BlockID.Transformation : BES.BlockPresence.OptSingle,
+                                     BES.BlockID.Unk38          : BES.BlockPresence.OptSingle,
+                                     BES.BlockID.Material       : BES.BlockPresence.OptSingle},
+                                    data[8 + name_size:])
+        finally:
+            self.object_stack.pop()
+            self.skip_blocks = skip_blocks
 
         if len(res[BES.BlockID.Object]) != children:
             raise BESError("Number of object children does not match")
 
         for obj in res[BES.BlockID.Object]:
-            model.children.append(obj)
+            if obj is not None:
+                model.children.append(obj)
         if res[BES.BlockID.Transformation]:
             (model.translation, model.rotation, model.scale) = res[BES.BlockID.Transformation]
         if res[BES.BlockID.Model]:
@@ -320,6 +587,15 @@ class BES(object):
             model.materials = res[BES.BlockID.Material]
             # TODO check all children meshes for valid materials
 
+        model_blocks = res[BES.BlockID.Model] or {}
+        for (parent, block) in [(BES.BlockID.Object, res[BES.BlockID.Properties]),
+                                (BES.BlockID.Object, res[BES.BlockID.Unk38]),
+                                (BES.BlockID.Model,  model_blocks.get(BES.BlockID.Properties)),
+                                (BES.BlockID.Model,  model_blocks.get(BES.BlockID.Unk36))]:
+            if block:
+                block.parent = parent
+                model.raw_blocks.append(block)
+
         return model
 
     def parse_block_model(self, data):
@@ -331,7 +607,7 @@ class BES(object):
                                  BES.BlockID.Unk36          : BES.BlockPresence.OptSingle},
                                 data[4:])
 
-        if mesh_children != len(res[BES.BlockID.Mesh]):
+        if BES.BlockID.Mesh not in self.skip_blocks and mesh_children != len(res[BES.BlockID.Mesh]):
             raise BESError("Number of meshes does not match")
 
         return res
@@ -339,27 +615,87 @@ class BES(object):
     def parse_block_mesh(self, data):
         """ Parse Mesh block and return BESMesh instance """
         (material,) = self.unpack("<I", data)
-        vertices = None
-        faces = None
 
         res = self.parse_blocks({BES.BlockID.Vertices  : BES.BlockPresence.ReqSingle,
                                  BES.BlockID.Faces     : BES.BlockPresence.ReqSingle},
                                 data[4:])
-        vertices = res[BES.BlockID.Vertices]
-        faces    = res[BES.BlockID.Faces]
+        mesh = BESMesh(res[BES.BlockID.Vertices], res[BES.BlockID.Faces], material)
+        mesh.data = data
+
+        # Geometry may be skipped by import mode, then there is nothing to check
+        if mesh.vertices is not None and mesh.faces is not None:
+            # Small meshes are not worth scheduling
+            if self.executor and len(mesh.vertices) + len(mesh.faces) > BES.ParallelChunk:
+                self.check_mesh_parallel(mesh)
+            else:
+                self.check_mesh(mesh)
+
+        return mesh
 
-        if max(max(faces, key=lambda item:item[1])) > len(vertices):
+    def check_mesh(self, mesh):
+        """ Check face indices of mesh and compute its bounds """
+        self.finish_mesh(mesh, [coords_bounds(mesh.vertices["coords"])], [faces_max(mesh.faces)])
+
+    def check_mesh_parallel(self, mesh):
+        """
+        Schedule checks of mesh by chunks of BES.ParallelChunk rows in thread pool
+        (numpy releases GIL in reductions), they are combined by read_data
+        """
+        coords = mesh.vertices["coords"]
+        bounds = [self.executor.submit(coords_bounds, coords[start:start + BES.ParallelChunk])
+                  for start in range(0, len(coords), BES.ParallelChunk)]
+        maxima = [self.executor.submit(faces_max, mesh.faces[start:start + BES.ParallelChunk])
+                  for start in range(0, len(mesh.faces), BES.ParallelChunk)]
+        self.jobs.extend(bounds + maxima)
+        self.parallel_meshes.append((mesh, bounds, maxima))
+
+    def finish_mesh(self, mesh, bounds, maxima):
+        """ Check and set mesh from bounds of its vertex chunks and maximal indices of face chunks """
+        if max(maxima, default=-1) >= len(mesh.vertices):
             raise BESError("Invalid faces number")
 
-        return BESMesh(vertices, faces, material)
+        bounds = [chunk for chunk in bounds if chunk is not None]
+        if bounds:
+            mesh.bounds = numpy.array([numpy.min([chunk[0] for chunk in bounds], axis=0),
+                                       numpy.max([chunk[1] for chunk in bounds], axis=0)])
+
+    def compute_bounds(self, cached = None):
+        """
+        Set world bounds of all meshes and objects. Every mesh is placed by transformation
+        of its own object only, the same way as by importer (parent objects are imported
+        as empties without transformation). Bounds of meshes without decoded geometry
+        are taken from 'cached' dict (as returned by previous call).
+        Return dict of local bounds of all known meshes, keyed by object path and mesh ID.
+        """
+        bounds = dict(cached or {})
+        for root in self.objects:
+            # Children are processed before their parents (reversed preorder)
+            for obj in reversed(list(root.walk())):
+                boxes = [child.bounds for child in obj.children if child.bounds is not None]
+                # Meshes of root object are not imported
+                if obj is not root:
+                    matrix = obj.matrix()
+                    for (mesh_id, mesh) in enumerate(obj.meshes):
+                        key = "{}:{}".format(obj.path, mesh_id)
+                        if mesh.bounds is None and key in bounds:
+                            mesh.bounds = numpy.array(bounds[key]).reshape(2, 3)
+                        if mesh.bounds is not None:
+                            bounds[key] = mesh.bounds.ravel().tolist()
+                            mesh.world_bounds = transform_bounds(mesh.bounds, matrix)
+                            boxes.append(mesh.world_bounds)
+                obj.bounds = union_bounds(boxes)
+
+        return bounds
 
     def parse_block_vertices(self, data):
-        """ Parse Vertices block and return list of BESVertex instances """
+        """
+        Parse Vertices block and return numpy record array of vertices (see BESVertex.dtype).
+        Array is a view into BES data, so vertices are not copied.
+        """
         (count, size, flags) = self.unpack("<III", data)
         texCnt = (flags & BESVertex.Flags.TexcountMask) >> BESVertex.Flags.TexcountShift
         flagsMin = BESVertex.Flags.XYZ | BESVertex.Flags.Normal
         flagsMax = flagsMin | BESVertex.Flags.TexcountMask
-        vertices = []
 
         if (flags & flagsMin) != flagsMin or (flags | flagsMax) != flagsMax:
             raise("Unsupported vertex flags: {:08x}".format(flags))
@@ -370,44 +706,28 @@ class BES(object):
         if count * size != len(data[12:]):
             raise BESError("Block size mismatch")
 
-        ptr = 12
-        for i in range(count):
-            coords = self.unpack("<fff", data[ptr:])
-            ptr += 12
-            normals = self.unpack("<fff", data[ptr:])
-            ptr += 12
-
-            uv_array = []
-            for texID in range(texCnt):
-                uv = self.unpack("<ff", data[ptr:])
-                uv_array.append(uv)
-                ptr += 8
-
-            vertices.append(BESVertex(coords, normals, uv_array))
-
-        return vertices
+        # UV coords are skipped by vertex size when they are not required
+        readCnt = texCnt if self.read_uv else 0
+        return numpy.frombuffer(data, dtype=BESVertex.dtype(size, readCnt), count=count, offset=12)
 
     def parse_block_faces(self, data):
         """
-        Parse Faces block and return list of tuples.
-        Each tuple means one face made of 3 integers (vertices IDs)
+        Parse Faces block and return numpy array of shape (count, 3).
+        Each row means one face made of 3 integers (vertices IDs)
         """
         (count,) = self.unpack("<I", data)
-        faces = []
 
         if count * 12 != len(data[4:]):
             raise BESError("Block size mismatch")
 
-        ptr = 4
-        for i in range(count):
-            face = self.unpack("<III", data[ptr:])
-            faces.append(face)
-            ptr += 12
+        return numpy.frombuffer(data, dtype="<u4", count=count * 3, offset=4).reshape(count, 3)
 
-        return faces
+    def parse_block_raw(self, label, data):
+        """ Return BESBlock referencing payload of block which is not decoded """
+        return BESBlock(label, self.data_start + buffer_address(data) - self.data_address, data)
 
     def parse_block_properties(self, data):
-        pass
+        return self.parse_block_raw(BES.BlockID.Properties, data)
 
     def parse_block_transformation(self, data):
         """
@@ -424,11 +744,11 @@ class BES(object):
         return (translation, rotation, scale)
 
     def parse_block_unk36(self, data):
-        pass
+        return self.parse_block_raw(BES.BlockID.Unk36, data)
     def parse_block_unk38(self, data):
-        pass
+        return self.parse_block_raw(BES.BlockID.Unk38, data)
     def parse_block_user_info(self, data):
-        pass
+        return self.parse_block_raw(BES.BlockID.UserInfo, data)
 
     def parse_block_material(self, data):
         (materialCnt,) = self.unpack("<I", data)
@@ -438,13 +758,15 @@ class BES(object):
         # func, instead of this we use parse_block_by_label directly
         start = 4
         for matID in range(materialCnt):
-            (label, size) = self.parse_block_desc(data[start:])
+            (label, size) = self.parse_block_desc(data, start)
 
             if label not in [BES.BlockID.Bitmap, BES.BlockID.PteroMat]:
                 raise BESError("Invalid material")
 
             subblock = data[start + 8: start + size]
-            materials.append(self.parse_block_by_label(label, subblock))
+            material = self.parse_block_by_label(label, subblock)
+            material.data = subblock
+            materials.append(material)
             start += size
 
         if materialCnt != len(materials):
@@ -472,6 +794,7 @@ class BES(object):
                     tex = BESTextureFilter(tex_name, uv_order)
                 else:
                     tex = BESTextureUnknown(tex_name, uv_order)
+                tex.coord = coord
                 textures.append(tex)
 
                 ptr += 8 + tex_name_size
@@ -517,12 +840,65 @@ class BES(object):
                     tex = BESTextureFilter(tex_name, uv_order)
                 else:
                     tex = BESTextureUnknown(tex_name, uv_order)
+                # Upper bits of 'coord' are texture type, lower bits are kept as UV channel hint
+                tex.coord = coord & ((1 << BESPteroMat.texOffset) - 1)
                 textures.append(tex)
 
                 ptr += 8 + tex_name_size
 
         return BESPteroMat(name, transparent, textures)
 
+class BESCache(object):
+    """
+    LRU cache of parsed BES files, so repeated imports of the same file skip parsing.
+    Files are keyed by their path, size and mtime (and parse options). Memory of cached
+    files is estimated by their size and limited by 'capacity' bytes.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        # Key -> (BES, estimated size), least recently used first
+        self.items = collections.OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, mode = BES.ImportMode.Full, threads = 1, selection = None):
+        """ Return parsed BES file from cache, or parse it and add it into cache """
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            raise BESError(str(e))
+
+        key = (path, stat.st_size, stat.st_mtime, mode, frozenset(selection) if selection else None)
+        if key in self.items:
+            self.items.move_to_end(key)
+            self.hits += 1
+            return self.items[key][0]
+
+        self.misses += 1
+        bes = BES(path, mode = mode, threads = threads, selection = selection)
+
+        # Whole file is kept in memory, parsed geometry only references it
+        size = stat.st_size
+        if size <= self.capacity:
+            # Older versions of the same file will never be used again
+            for old_key in [k for k in self.items if k[0] == path and k[1:3] != key[1:3]]:
+                self.remove(old_key)
+            self.items[key] = (bes, size)
+            self.size += size
+            while self.size > self.capacity:
+                self.remove(next(iter(self.items)))
+
+        return bes
+
+    def remove(self, key):
+        (bes, size) = self.items.pop(key)
+        self.size -= size
+
+    def clear(self):
+        self.items.clear()
+        self.size = 0
+
 class AddDirs(bpy.types.Operator):
     bl_idname = "import_mesh.add_dirs"
     bl_label = "Add Directories"
@@ -560,9 +936,49 @@ class RemoveDir(bpy.types.Operator):
 
         return {'FINISHED'}
 
+class BESTreeItem(bpy.types.PropertyGroup):
+    # Object path within BES file (see BESObject.path)
+    path = StringProperty()
+    # Number of ancestors of object (root children have zero depth)
+    depth = IntProperty()
+    # Import object with all its children
+    checked = BoolProperty(
+            name="Import",
+            description="Import this object with all its children",
+            default=False,
+            )
+
+class BES_UL_tree(bpy.types.UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        row = layout.row(True)
+        for level in range(item.depth):
+            row.label("", icon='BLANK1')
+        # Children of checked objects are imported anyway
+        row.active = not ancestor_checked(data.tree_items, index)
+        row.prop(item, "checked", text=item.name)
+
+def ancestor_checked(items, index):
+    """ Return True if any ancestor of tree item at given index is checked """
+    depth = items[index].depth
+    for idx in range(index - 1, -1, -1):
+        if depth == 0:
+            break
+        if items[idx].depth < depth:
+            if items[idx].checked:
+                return True
+            depth = items[idx].depth
+    return False
+
+# Wall time (in seconds) spent in phases of the last import, read by benchmark_bes.py
+last_import_times = {}
+
+# Parsed BES files shared by all imports in this session
+bes_cache = BESCache(512 * 1024 * 1024)
+
 class BESImporter(bpy.types.Operator, ImportHelper):
     bl_idname = "import_mesh.bes"
     bl_label  = "Import BES files"
+    bl_options = {'UNDO'}
 
     # Show only "*.bes" files for import
     filter_glob = StringProperty(
@@ -573,6 +989,84 @@ class BESImporter(bpy.types.Operator, ImportHelper):
     # Active directory
     directory = StringProperty(options={'HIDDEN'})
 
+    # Which parts of BES files are imported
+    import_mode = EnumProperty(
+            name="Import",
+            description="Import only some parts of BES files, the rest is skipped without decoding",
+            items=[
+                (BES.ImportMode.Full,       "Everything",          "Import whole models"),
+                (BES.ImportMode.Hierarchy,  "Hierarchy only",      "Import objects and transformations, meshes are replaced by empties"),
+                (BES.ImportMode.NoUV,       "Geometry without UV", "Import models without UV mapping"),
+                (BES.ImportMode.Materials,  "Materials only",      "Import materials and textures, models are skipped"),
+                (BES.ImportMode.NoTextures, "No textures",         "Import models and materials, textures are not loaded"),
+            ],
+            default=BES.ImportMode.Full,
+            )
+
+    # Import meshes as low detail proxies
+    proxy_mode = EnumProperty(
+            name="Proxy",
+            description="Import meshes as low detail proxies, which can be later replaced by full resolution meshes",
+            items=[
+                ('NONE',     "Full resolution", "Import full resolution meshes"),
+                ('BOUNDS',   "Bounding box",    "Replace every mesh by its bounding box"),
+                ('DECIMATE', "Decimated",       "Replace every mesh by its decimated version"),
+            ],
+            default='NONE',
+            )
+
+    # Ratio of vertices kept by decimated proxies
+    proxy_ratio = FloatProperty(
+            name="Proxy ratio",
+            description="Approximate ratio of vertices kept in decimated proxies",
+            min=0.001, max=1.0,
+            default=0.1,
+            )
+
+    # Bake transformations and merge meshes by material
+    static_batch = BoolProperty(
+            name="Static batching",
+            description="Bake object transformations into meshes and merge all meshes "
+                        "with the same material into single object (object hierarchy is lost)",
+            default=False,
+            )
+
+    # Import only objects within region of interest
+    use_region = BoolProperty(
+            name="Region of interest",
+            description="Import only meshes whose world bounds intersect given region",
+            default=False,
+            )
+
+    region_min = FloatVectorProperty(
+            name="Min",
+            description="Minimal corner of region of interest",
+            subtype='XYZ',
+            default=(-100.0, -100.0, -100.0),
+            )
+
+    region_max = FloatVectorProperty(
+            name="Max",
+            description="Maximal corner of region of interest",
+            subtype='XYZ',
+            default=(100.0, 100.0, 100.0),
+            )
+
+    # Check large meshes of BES files in parallel
+    parallel = BoolProperty(
+            name="Parallel parsing",
+            description="Check face indices and compute bounds of large meshes on all CPU cores "
+                        "while the rest of file is parsed",
+            default=False,
+            )
+
+    # Use normals stored in BES as custom split normals
+    use_normals = BoolProperty(
+            name="Import normals",
+            description="Use vertex normals stored in BES files as custom split normals",
+            default=False,
+            )
+
     # Search directories recursively
     dir_search_r = BoolProperty(
             name="Search directories recursively",
@@ -580,6 +1074,19 @@ class BESImporter(bpy.types.Operator, ImportHelper):
             default=False,
             )
 
+    # Load downscaled versions of textures
+    texture_proxy = EnumProperty(
+            name="Texture size",
+            description="Load textures downscaled to given size (downscaled textures are cached on disk)",
+            items=[
+                ('0',   "Full resolution", "Load original textures"),
+                ('128', "128 px",          "Load textures downscaled to 128 pixels"),
+                ('256', "256 px",          "Load textures downscaled to 256 pixels"),
+                ('512', "512 px",          "Load textures downscaled to 512 pixels"),
+            ],
+            default='0',
+            )
+
     # Ignore texture extensions checkbox
     dir_ext_ignore = BoolProperty(
             name="Ignore texture extensions",
@@ -601,15 +1108,47 @@ class BESImporter(bpy.types.Operator, ImportHelper):
     tex_dirs = CollectionProperty(type=bpy.types.PropertyGroup)
     tex_dirs_index = IntProperty()
 
+    # Object hierarchy of file selected in dialog, filled by update_tree
+    tree_file = StringProperty(options={'HIDDEN', 'SKIP_SAVE'})
+    tree_items = CollectionProperty(type=BESTreeItem, options={'SKIP_SAVE'})
+    tree_items_index = IntProperty(options={'SKIP_SAVE'})
+
     def draw(self, context):
         layout = self.layout
 
+        # Show import mode selection
+        layout.prop(self, "import_mode")
+
+        # Show proxy settings
+        layout.prop(self, "proxy_mode")
+        if self.proxy_mode == 'DECIMATE':
+            layout.prop(self, "proxy_ratio")
+
+        # Show checkbox for static batching
+        layout.prop(self, "static_batch")
+
+        # Show region of interest
+        layout.prop(self, "use_region")
+        if self.use_region:
+            row = layout.row()
+            row.column().prop(self, "region_min")
+            row.column().prop(self, "region_max")
+
+        # Show checkbox for importing normals
+        layout.prop(self, "use_normals")
+
+        # Show checkbox for parallel parsing
+        layout.prop(self, "parallel")
+
         # Show checkbox for recursive search
         layout.prop(self, "dir_search_r")
 
         # Show checkbox for ignoring extensions
         layout.prop(self, "dir_ext_ignore")
 
+        # Show texture proxy size selection
+        layout.prop(self, "texture_proxy")
+
         # Row for adding/removing dirs where may be located textures
         row = layout.row(True)
         row.label("Search directories for textures")
@@ -627,167 +1166,1123 @@ class BESImporter(bpy.types.Operator, ImportHelper):
         # Show 'tex_dirs' items as a rows in widget list
         layout.template_list("UI_UL_list", "TexSubDirs", self, "tex_dirs", self, "tex_dirs_index")
 
+        # Show object hierarchy of selected file, so only some of its subtrees may be imported
+        self.update_tree()
+        if len(self.tree_items) > 0:
+            layout.label("Objects to import (all if none is checked)")
+            layout.template_list("BES_UL_tree", "BESTree", self, "tree_items", self, "tree_items_index")
+
+    def update_tree(self):
+        """ Read object hierarchy of file selected in dialog (geometry is not decoded) """
+        path = os.path.normpath(self.filepath) if self.filepath else ""
+        if path == self.tree_file:
+            return
+
+        self.tree_file = path
+        self.tree_items.clear()
+        if not os.path.isfile(path):
+            return
+
+        try:
+            bes = BES(path, mode = BES.ImportMode.Tree)
+        except (BESError, OSError):
+            return
+        for root in bes.objects:
+            for obj in root.walk():
+                if obj is root:
+                    continue
+                item = self.tree_items.add()
+                item.name = obj.name
+                item.path = obj.path
+                item.depth = obj.path.count("/")
+
+    def tree_selection(self, path):
+        """ Return paths of objects checked in dialog for given file (None imports everything) """
+        if os.path.normpath(path) != self.tree_file:
+            return None
+        return {item.path for item in self.tree_items if item.checked} or None
+
     def execute(self, context):
         models = []
+        times = dict.fromkeys(("index", "parse", "materials", "objects", "link"), 0.0)
 
         # Make a list of all directories where script will search for textures
         search_dirs = [self.directory]
         search_dirs.extend(d.name for d in self.tex_dirs)
-        if self.dir_search_r:
-            # Add all subdirectories recursively
-            for root_dir in search_dirs:
-                 for sub_root, dirs, files in os.walk(root_dir):
-                     for sub_dir in dirs:
-                         new_dir = os.path.join(sub_root, sub_dir)
-                         if new_dir not in search_dirs:
-                             search_dirs.append(new_dir)
+
+        # Index textures in all search directories (and their subdirectories if required)
+        start = time.perf_counter()
+        tex_index = TextureIndex()
+        for root_dir in search_dirs:
+            tex_index.add_root(root_dir, self.dir_search_r)
+        times["index"] += time.perf_counter() - start
 
         # Parse all selected files
+        start = time.perf_counter()
         for f in self.files:
             # Parse BES file
             try:
-                bes = BES(os.path.join(self.directory, f.name))
+                threads = (os.cpu_count() or 1) if self.parallel else 1
+                path = os.path.join(self.directory, f.name)
+                bes = bes_cache.get(path, mode = self.import_mode, threads = threads,
+                                    selection = self.tree_selection(path))
                 models.append(bes)
             except BESError as e:
                 self.report({'ERROR'}, e.msg)
+        times["parse"] += time.perf_counter() - start
+
+        # Remember texture search settings in imported materials, so they can be reloaded
+        self.search_dirs = search_dirs
+
+        # Objects are only created while loading models, they are parented and linked
+        # into scene all at once after that
+        self.new_objects = []
+        self.region = None
+        if self.use_region:
+            self.region = numpy.array([self.region_min, self.region_max])
 
         # Load all parsed models
         for bes in models:
+            self.bes_path = bes.path
+            self.bes_stamp = file_stamp(bes.path)
+
+            # Bounds of meshes without decoded geometry may be known from previous imports
+            start = time.perf_counter()
+            cached = load_bounds_cache(bes.path)
+            bounds = bes.compute_bounds(cached)
+            if bounds and bounds != cached:
+                save_bounds_cache(bes.path, bounds)
+            times["parse"] += time.perf_counter() - start
+
+            # Every file gets its own group and all its names get unique prefix,
+            # so Blender does not need to search for free names
+            self.prefix = unique_prefix(bes.path)
+            self.used_names = set()
+            # Name -> number of its next suffix
+            self.name_counts = dict()
+            self.group = bpy.data.groups.new(self.prefix)
+            self.textures = dict()
+
             # Parse all objects in BES file
             for bes_roots in bes.objects:
                 # Create materials
-                bpy_materials = []
-                for mat in bes_roots.materials:
-                    name = mat.name if isinstance(mat, BESPteroMat) else "bitmap"
-                    bpy_mat = bpy.data.materials.new(name)
-                    bpy_mat.use_transparency = mat.transparent
-                    bpy_mat.alpha = 0.0 if mat.transparent else bpy_mat.alpha
-                    bpy_materials.append(bpy_mat)
-
-                    # Create textures
-                    for idx, tex in enumerate(mat.textures):
-                        tex_file = tex.file_name
-                        bpy_tex = bpy.data.textures.new(os.path.splitext(tex_file)[0], 'IMAGE')
-                        tex_paths = []
-
-                        # Search for files with any extension supported by
-                        # PteroEngine (which is BESMaterial.TexExtensions) if users
-                        # chose to ignore extensions
-                        tex_exts = BESMaterial.TexExtensions if self.dir_ext_ignore else []
-
-                        # Since Vietcong is Windows game, we need to work with texture name as
-                        # case insensitive. On top of that, the user has a possibility to choose
-                        # directories where textures may be located
-                        for tex_dir in search_dirs:
-                            tex_paths.extend(get_case_insensitive_path(tex_dir, tex_file, tex_exts))
-
-                        # Try to load image from file
-                        if len(tex_paths) != 0:
-                            # Sort found textures by extension (PteroEngine requires following
-                            # priority: dds, tga, bmp)
-                            tex_paths.sort(key=functools.cmp_to_key(sort_ext))
-
-                            # Simply choose any texture with extension of the highest priority
-                            tex_path = ".".join(tex_paths[0])
-                            bpy_tex.image = bpy.data.images.load(tex_path)
-                        else:
-                            self.report({'WARNING'}, "Texture '{}' not found".format(tex_file))
-
-                        slot = bpy_mat.texture_slots.add()
-                        slot.texture = bpy_tex
-                        slot.use_map_alpha = tex.use_alpha
-                        slot.alpha_factor = 1.0 if tex.use_alpha else slot.alpha_factor
-                        slot.blend_type = tex.blend_type
-                        slot.uv_layer = "{}-{}.uv".format(bpy_mat.name, idx)
+                start = time.perf_counter()
+                uv_channels = shared_uv_channels(bes_roots)
+                bpy_materials = self.create_materials(bes_roots.materials, tex_index, uv_channels)
+                times["materials"] += time.perf_counter() - start
+
+                # Blocks of root object (user info) belong to whole file
+                store_raw_blocks(self.group, self.bes_path, self.bes_stamp, bes_roots.raw_blocks)
+
+                # Models were skipped by parser in this mode
+                if self.import_mode == BES.ImportMode.Materials:
+                    continue
 
                 # Create objects
-                for bes_obj in bes_roots.children:
-                    self.add_object(bes_obj, bpy_materials, bes_roots.materials, None)
+                start = time.perf_counter()
+                if self.static_batch:
+                    self.add_static_batch(bes_roots, bpy_materials)
+                else:
+                    for bes_obj in bes_roots.children:
+                        self.add_object(bes_obj, bpy_materials, bes_roots.materials, None)
+                times["objects"] += time.perf_counter() - start
+
+        # Parent and link all created objects, then update scene only once
+        start = time.perf_counter()
+        link_objects(context.scene, self.new_objects)
+        context.scene.update()
+        times["link"] += time.perf_counter() - start
+        self.new_objects = []
+
+        last_import_times.clear()
+        last_import_times.update(times)
 
         return {'FINISHED'}
 
+    def create_materials(self, bes_mats, tex_index, uv_channels):
+        """
+        Create Blender materials (and their textures) and return them in BES order.
+        Textures of material use UV layers given by 'uv_channels' (see shared_uv_channels).
+        """
+        bpy_materials = []
+        use_textures = self.import_mode != BES.ImportMode.NoTextures
+        for mat_id, mat in enumerate(bes_mats):
+            name = mat.name if isinstance(mat, BESPteroMat) else "bitmap"
+            bpy_mat = bpy.data.materials.new(self.unique_name(name))
+            bpy_mat.use_transparency = mat.transparent
+            bpy_mat.alpha = 0.0 if mat.transparent else bpy_mat.alpha
+            bpy_mat["bes_uv_channels"] = uv_channels[mat_id]
+            bpy_materials.append(bpy_mat)
+
+            # Remember source of material for reloading
+            bpy_mat["bes_source"] = {
+                "file"      : self.bes_path,
+                "stamp"     : self.bes_stamp,
+                "prefix"    : self.prefix,
+                "material"  : mat_id,
+                "hash"      : mat.hash(),
+                "textures"  : use_textures,
+                # ID property arrays cannot hold strings, so every directory is wrapped into dict
+                "dirs"      : [{"path": d} for d in self.search_dirs],
+                "recursive" : self.dir_search_r,
+                "ext_ignore": self.dir_ext_ignore,
+                "proxy_size": int(self.texture_proxy),
+            }
+
+            # Textures are not loaded at all in this mode
+            if not use_textures:
+                continue
+
+            # Create textures
+            for tex_file in load_textures(bpy_mat, mat, tex_index, self.dir_ext_ignore,
+                                          uv_channels[mat_id], int(self.texture_proxy),
+                                          self.prefix, self.textures):
+                self.report({'WARNING'}, "Texture '{}' not found".format(tex_file))
+
+        return bpy_materials
+
     def add_object(self, bes_obj, bpy_mats, bes_mats, parent):
+        # Whole subtree is outside of region of interest
+        if self.region is not None and bounds_outside(bes_obj.bounds, self.region):
+            return
+
         # Create new object
-        bpy_obj = bpy.data.objects.new(bes_obj.name, None)
-        bpy_obj.parent = parent
+        bpy_obj = bpy.data.objects.new(self.unique_name(bes_obj.name), None)
+        self.new_objects.append((bpy_obj, parent, self.group))
+        store_raw_blocks(bpy_obj, self.bes_path, self.bes_stamp, bes_obj.raw_blocks)
 
         # Since Blender does not allow multiple meshes for single object (while BES does),
         # we have to create seperate object for every mesh.
         for mesh_id in range(len(bes_obj.meshes)):
             bes_mesh = bes_obj.meshes[mesh_id]
+            if self.region is not None and bounds_outside(bes_mesh.world_bounds, self.region):
+                continue
 
             # In BES the meshes do not have names, so we create one from object name and mesh ID
-            mesh_name = "{}.{:08X}".format(bes_obj.name, mesh_id)
+            mesh_name = self.unique_name("{}.{:08X}".format(bes_obj.name, mesh_id))
 
-            # Create new mesh
-            bpy_mesh = bpy.data.meshes.new(mesh_name)
+            # Mesh geometry was skipped by import mode, so use empty in place of mesh
+            if bes_mesh.vertices is None:
+                mesh_obj = bpy.data.objects.new(mesh_name, None)
+                self.new_objects.append((mesh_obj, bpy_obj, self.group))
 
-            # Create new object from mesh and add it into scene
+                mesh_obj.location = bes_obj.translation
+                mesh_obj.rotation_euler = Euler(bes_obj.rotation, 'XYZ')
+                mesh_obj.scale = bes_obj.scale
+                continue
+
+            bpy_mat = None
+            bes_mat = None
+            if bes_mesh.material != BESMaterial.NoneMaterial:
+                bpy_mat = bpy_mats[bes_mesh.material]
+                bes_mat = bes_mats[bes_mesh.material]
+            use_uv = self.import_mode != BES.ImportMode.NoUV
+
+            # Create new mesh (or its low detail proxy)
+            if self.proxy_mode == 'NONE':
+                bpy_mesh = create_mesh(mesh_name, bes_mesh, bpy_mat, bes_mat, self.use_normals, use_uv)
+            else:
+                bpy_mesh = create_proxy_mesh(mesh_name, bes_mesh, bpy_mat, self.proxy_mode, self.proxy_ratio)
+
+            # Create new object from mesh, it is added into scene later
             mesh_obj = bpy.data.objects.new(mesh_name, bpy_mesh)
-            mesh_obj.parent = bpy_obj
-            bpy.context.scene.objects.link(mesh_obj)
+            self.new_objects.append((mesh_obj, bpy_obj, self.group))
+
+            # Remember where full resolution mesh is, so proxy may be replaced later
+            if self.proxy_mode != 'NONE':
+                mesh_obj["bes_proxy"] = {
+                    "file"   : self.bes_path,
+                    "object" : bes_obj.path,
+                    "mesh"   : mesh_id,
+                    "normals": self.use_normals,
+                    "uv"     : use_uv,
+                }
+            # Remember source of mesh and its content for reloading
+            else:
+                mesh_obj["bes_source"] = {
+                    "file"     : self.bes_path,
+                    "stamp"    : self.bes_stamp,
+                    "object"   : bes_obj.path,
+                    "mesh"     : mesh_id,
+                    "hash"     : bes_mesh.hash(),
+                    "transform": object_transform(bes_obj),
+                    "normals"  : self.use_normals,
+                    "uv"       : use_uv,
+                }
 
             # Apply translation, rotation and scale
             mesh_obj.location = bes_obj.translation
             mesh_obj.rotation_euler = Euler(bes_obj.rotation, 'XYZ')
             mesh_obj.scale = bes_obj.scale
 
-            # Update mesh data
-            mesh_coords = list(vert.coords for vert in bes_mesh.vertices)
-            bpy_mesh.from_pydata(mesh_coords, [], bes_mesh.faces)
-            bpy_mesh.update(calc_edges = True)
-
-            # Assign material to object
-            if bes_mesh.material != BESMaterial.NoneMaterial:
-                mesh_obj.data.materials.append(bpy_mats[bes_mesh.material])
-
-                # Apply UV mapping
-                uvtexs = []
-                uvlayers = []
-                # Create uv_texture for all material textures
-                for idx, tex in enumerate(bes_mats[bes_mesh.material].textures):
-                    uvtex = bpy_mesh.uv_textures.new()
-                    uvtex.name = "{}-{}.uv".format(bpy_mats[bes_mesh.material].name, idx)
-                    uvtex.active = True
-                    uvlayer = bpy_mesh.uv_layers[uvtex.name]
-
-                    uvtexs.append(uvtex)
-                    uvlayers.append(uvlayer)
-
-                # Update uv data for all vertices/textures
-                for polygon in bpy_mesh.polygons:
-                    for vert, loop in zip(polygon.vertices, polygon.loop_indices):
-                        for idx, tex in enumerate(bes_mats[bes_mesh.material].textures):
-                            uv_vect = Vector(bes_mesh.vertices[vert].uv[idx])
-                            uv_vect.y = 1.0 - uv_vect.y # Convert UV coords from BES to Blender
-                            uvlayers[idx].data[loop].uv = uv_vect
-
         # Add children
         for bes_child in bes_obj.children:
             self.add_object(bes_child, bpy_mats, bes_mats, bpy_obj)
 
-        # Add object into scene
-        bpy.context.scene.objects.link(bpy_obj)
+    def add_static_batch(self, bes_root, bpy_mats):
+        """
+        Bake transformations of all meshes under root object into their vertices
+        and create single object for every material from all meshes using it
+        """
+        # Every mesh is placed by transformation of its own object only, the same way
+        # as by add_object (parent objects are imported as empties without transformation)
+        batches = dict()
+        for bes_obj in bes_root.walk():
+            if bes_obj is bes_root:
+                continue
+            matrix = bes_obj.matrix()
+
+            for bes_mesh in bes_obj.meshes:
+                # Mesh geometry was skipped by import mode or mesh is outside of region of interest
+                if bes_mesh.vertices is None or \
+                        (self.region is not None and bounds_outside(bes_mesh.world_bounds, self.region)):
+                    continue
+                batches.setdefault(bes_mesh.material, []).append((matrix, bes_mesh))
+
+        use_uv = self.import_mode != BES.ImportMode.NoUV
+        for material in sorted(batches):
+            bpy_mat = None
+            bes_mat = None
+            tex_cnt = 0
+            if material != BESMaterial.NoneMaterial:
+                bpy_mat = bpy_mats[material]
+                bes_mat = bes_root.materials[material]
+                tex_cnt = len(bes_mat.textures) if use_uv else 0
+
+            name = self.unique_name(bes_mat.name if isinstance(bes_mat, BESPteroMat) else
+                                    "bitmap" if bes_mat else "none")
+            bes_mesh = merge_meshes(batches[material], material, tex_cnt)
+            bpy_mesh = create_mesh(name, bes_mesh, bpy_mat, bes_mat, self.use_normals, use_uv)
+
+            bpy_obj = bpy.data.objects.new(name, bpy_mesh)
+            self.new_objects.append((bpy_obj, None, self.group))
+
+    def unique_name(self, name):
+        """ Return name prefixed by prefix of imported file, unique among names of that file """
+        # Blender truncates longer names, which would make them collide again
+        name = "{}:{}".format(self.prefix, name)[:MaxNameLength]
+
+        # Suffixes are counted per name, so many objects of the same name do not probe all of them
+        count = self.name_counts.get(name, 0)
+        unique = name if count == 0 else suffixed_name(name, count)
+        while unique in self.used_names:
+            count += 1
+            unique = suffixed_name(name, count)
+        self.name_counts[name] = count + 1
+        self.used_names.add(unique)
+        return unique
+
+class BESFullDetail(bpy.types.Operator):
+    bl_idname = "object.bes_full_detail"
+    bl_label = "Load Full Detail"
+    bl_description = "Replace proxies of selected objects by full resolution meshes from BES files"
+
+    @classmethod
+    def poll(self, context):
+        return any("bes_proxy" in obj for obj in context.selected_objects)
+
+    def execute(self, context):
+        # Group proxies by their BES files, so every file is parsed only once
+        proxies = dict()
+        for obj in context.selected_objects:
+            if "bes_proxy" in obj:
+                proxies.setdefault(obj["bes_proxy"]["file"], []).append(obj)
+
+        for path, objs in proxies.items():
+            try:
+                meshes = BES(path).mesh_map()
+            except BESError as e:
+                self.report({'ERROR'}, e.msg)
+                continue
+
+            for obj in objs:
+                info = obj["bes_proxy"]
+                key = (info["object"], info["mesh"])
+                if key not in meshes:
+                    self.report({'WARNING'}, "Mesh of '{}' not found in '{}'".format(obj.name, path))
+                    continue
+                (bes_root, bes_obj, bes_mesh) = meshes[key]
+
+                proxy = obj.data
+                bpy_mat = proxy.materials[0] if len(proxy.materials) > 0 else None
+                bes_mat = bes_root.materials[bes_mesh.material] if bpy_mat else None
+
+                mesh_name = proxy.name
+                proxy.name = mesh_name + ".proxy"
+                obj.data = create_mesh(mesh_name, bes_mesh, bpy_mat, bes_mat,
+                                       bool(info["normals"]), bool(info["uv"]))
+                del obj["bes_proxy"]
+
+                if proxy.users == 0:
+                    bpy.data.meshes.remove(proxy)
+
+        return {'FINISHED'}
+
+class BESReload(bpy.types.Operator):
+    bl_idname = "object.bes_reload"
+    bl_label = "Reload Changed BES Files"
+    bl_description = "Update meshes, transformations and materials imported from BES files which changed"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    force = BoolProperty(
+            name="Check all files",
+            description="Compare content of all imported BES files, even if they seem unchanged",
+            default=False,
+            )
+
+    def execute(self, context):
+        updated = reload_bes_files(self.report, self.force)
+        self.report({'INFO'}, "{} items updated".format(updated))
+        return {'FINISHED'}
+
+class BESWatch(bpy.types.Operator):
+    bl_idname = "object.bes_watch"
+    bl_label = "Watch BES Files"
+    bl_description = "Periodically reload imported BES files when they change (run again to stop)"
+
+    interval = FloatProperty(
+            name="Interval",
+            description="Seconds between checks of BES files",
+            min=0.1,
+            default=2.0,
+            )
+
+    # Whether any watcher is running, cleared to stop it
+    running = False
+
+    def modal(self, context, event):
+        if not BESWatch.running:
+            context.window_manager.event_timer_remove(self.timer)
+            return {'CANCELLED'}
+
+        if event.type == 'TIMER':
+            reload_bes_files(self.report)
+
+        return {'PASS_THROUGH'}
+
+    def execute(self, context):
+        if BESWatch.running:
+            BESWatch.running = False
+            return {'FINISHED'}
+
+        BESWatch.running = True
+        self.timer = context.window_manager.event_timer_add(self.interval, context.window)
+        context.window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+class BESClearCache(bpy.types.Operator):
+    bl_idname = "import_mesh.bes_clear_cache"
+    bl_label = "Clear BES Cache"
+    bl_description = "Release BES files parsed by previous imports"
+
+    def execute(self, context):
+        bes_cache.clear()
+        return {'FINISHED'}
+
+def link_objects(scene, objects):
+    """
+    Set parents of all (object, parent, group) items first and then link
+    all objects into scene and their groups
+    """
+    for (bpy_obj, parent, group) in objects:
+        if parent is not None:
+            bpy_obj.parent = parent
+
+    scene_objects = scene.objects
+    for (bpy_obj, parent, group) in objects:
+        scene_objects.link(bpy_obj)
+        if group is not None:
+            group.objects.link(bpy_obj)
+
+# Maximal length of names of Blender datablocks
+MaxNameLength = 63
+
+def suffixed_name(name, count):
+    """ Return name with numeric suffix, shortened to fit into Blender names """
+    suffix = ".{:03d}".format(count)
+    return name[:MaxNameLength - len(suffix)] + suffix
+
+# Base of prefix -> number of its last suffix used in this session
+prefix_counts = dict()
+
+def unique_prefix(path):
+    """ Return short prefix made of BES file name, which is not used by any group yet """
+    base = os.path.splitext(os.path.basename(path))[0][:16]
+    prefix = base
+    # Suffixes continue from the last one, so repeated imports do not probe all of them
+    count = prefix_counts.get(base, 1)
+    while prefix in bpy.data.groups:
+        count += 1
+        prefix = "{}#{}".format(base, count)
+    prefix_counts[base] = count
+    return prefix
+
+def file_stamp(path):
+    """ Return [mtime, size] of file, used to find out if file changed since import """
+    stat = os.stat(path)
+    return [stat.st_mtime, stat.st_size]
+
+def object_transform(bes_obj):
+    return list(bes_obj.translation) + list(bes_obj.rotation) + list(bes_obj.scale)
+
+def store_raw_blocks(bpy_id, path, stamp, blocks):
+    """ Store references to raw BES blocks into ID property 'bes_raw_blocks' of datablock """
+    if not blocks:
+        return
+    bpy_id["bes_raw_blocks"] = {
+        "file"  : path,
+        "stamp" : stamp,
+        # Flat array of (label, parent, offset, size) quadruples
+        "blocks": [value for block in blocks for value in block.ref()],
+    }
+
+def load_raw_blocks(bpy_id):
+    """
+    Read raw BES blocks referenced by datablock from their source file without parsing it.
+    Return list of tuples (label, parent, payload).
+    """
+    if "bes_raw_blocks" not in bpy_id:
+        return []
+    info = bpy_id["bes_raw_blocks"]
+    path = info["file"]
+    refs = list(info["blocks"])
+
+    try:
+        if file_stamp(path) != list(info["stamp"]):
+            raise BESError("BES file '{}' changed since import".format(path))
+        blocks = []
+        with open(path, "rb") as f:
+            for idx in range(0, len(refs), 4):
+                (label, parent, offset, size) = refs[idx:idx + 4]
+                f.seek(offset)
+                blocks.append((label, parent, f.read(size)))
+    except OSError as e:
+        raise BESError(str(e))
+    return blocks
+
+def reload_bes_files(report, force = False):
+    """
+    Parse again BES files which changed since they were imported and update only those
+    meshes, transformations and materials whose content differs. Return number of updates.
+    """
+    # Find all objects and materials imported from every BES file
+    sources = dict()
+    for obj in bpy.data.objects:
+        if "bes_source" in obj:
+            sources.setdefault(obj["bes_source"]["file"], ([], []))[0].append(obj)
+    for bpy_mat in bpy.data.materials:
+        if "bes_source" in bpy_mat:
+            sources.setdefault(bpy_mat["bes_source"]["file"], ([], []))[1].append(bpy_mat)
+
+    updated = 0
+    for path, (objs, mats) in sources.items():
+        try:
+            stamp = file_stamp(path)
+        except OSError:
+            report({'WARNING'}, "BES file '{}' not found".format(path))
+            continue
+
+        if not force and all(list(item["bes_source"]["stamp"]) == stamp for item in objs + mats):
+            continue
+
+        try:
+            bes = BES(path)
+        except BESError as e:
+            report({'ERROR'}, e.msg)
+            continue
+        meshes = bes.mesh_map()
+        bes_mats = bes.objects[0].materials if len(bes.objects) > 0 else []
+        uv_channels = shared_uv_channels(bes.objects[0]) if len(bes.objects) > 0 else []
+
+        # Every import of the file has its own materials, keyed by import prefix and BES index
+        bpy_mats = dict()
+        # Found textures of every import, shared by file name like by importer (see load_textures)
+        textures = dict()
+        for bpy_mat in mats:
+            info = bpy_mat["bes_source"]
+            prefix = info.get("prefix", bpy_mat.name.partition(":")[0])
+            bpy_mats[(prefix, info["material"])] = bpy_mat
+            for slot in bpy_mat.texture_slots:
+                if slot is not None and slot.texture is not None and slot.texture.image is not None and \
+                        "bes_file" in slot.texture:
+                    textures.setdefault(prefix, dict())[slot.texture["bes_file"]] = (slot.texture, True)
+
+        # Update materials first, so rebuilt meshes use them
+        old_textures = set()
+        rebuilt_mats = set()
+        for ((prefix, mat_id), bpy_mat) in bpy_mats.items():
+            info = bpy_mat["bes_source"]
+            info["stamp"] = stamp
+            if mat_id >= len(bes_mats):
+                report({'WARNING'}, "Material '{}' not found in '{}'".format(bpy_mat.name, path))
+                continue
+
+            # UV channels may be shared differently when other materials or meshes changed
+            bes_mat = bes_mats[mat_id]
+            channels_changed = list(bpy_mat.get("bes_uv_channels", [])) != uv_channels[mat_id]
+            if bes_mat.hash() == info["hash"] and not channels_changed:
+                continue
+
+            bpy_mat.use_transparency = bes_mat.transparent
+            bpy_mat.alpha = 0.0 if bes_mat.transparent else 1.0
+            bpy_mat["bes_uv_channels"] = uv_channels[mat_id]
+            if channels_changed:
+                rebuilt_mats.add(bpy_mat.name)
+            if info["textures"]:
+                for idx in range(len(bpy_mat.texture_slots)):
+                    slot = bpy_mat.texture_slots[idx]
+                    if slot is not None and slot.texture is not None:
+                        old_textures.add(slot.texture.name)
+                    bpy_mat.texture_slots.clear(idx)
+
+                tex_index = TextureIndex()
+                for root_dir in info["dirs"]:
+                    tex_index.add_root(root_dir["path"], bool(info["recursive"]))
+                for tex_file in load_textures(bpy_mat, bes_mat, tex_index, bool(info["ext_ignore"]),
+                                              uv_channels[mat_id], info.get("proxy_size", 0),
+                                              prefix, textures.setdefault(prefix, dict())):
+                    report({'WARNING'}, "Texture '{}' not found".format(tex_file))
+
+            info["hash"] = bes_mat.hash()
+            updated += 1
+
+        # Remove textures (and their images) replaced by reloaded ones
+        for tex_name in old_textures:
+            bpy_tex = bpy.data.textures.get(tex_name)
+            if bpy_tex is not None and bpy_tex.users == 0:
+                image = bpy_tex.image
+                bpy.data.textures.remove(bpy_tex)
+                if image is not None and image.users == 0:
+                    bpy.data.images.remove(image)
+
+        for obj in objs:
+            info = obj["bes_source"]
+            info["stamp"] = stamp
+            key = (info["object"], info["mesh"])
+            if key not in meshes:
+                report({'WARNING'}, "Mesh of '{}' not found in '{}'".format(obj.name, path))
+                continue
+            (bes_root, bes_obj, bes_mesh) = meshes[key]
+
+            # UV layers of mesh must follow UV channels of its material
+            old_mats = obj.data.materials
+            channels_changed = len(old_mats) > 0 and old_mats[0] is not None and \
+                               old_mats[0].name in rebuilt_mats
+            if bes_mesh.hash() != info["hash"] or channels_changed:
+                # Material index is part of the mesh, so it may differ from the old one
+                bpy_mat = None
+                bes_mat = None
+                if bes_mesh.material != BESMaterial.NoneMaterial:
+                    if bes_mesh.material < len(bes_root.materials):
+                        bes_mat = bes_root.materials[bes_mesh.material]
+                        # Objects are in group named by prefix of their import
+                        for group in obj.users_group:
+                            bpy_mat = bpy_mats.get((group.name, bes_mesh.material), bpy_mat)
+                    if bpy_mat is None:
+                        report({'WARNING'}, "Material of '{}' not found in '{}'".format(obj.name, path))
+                        bes_mat = None
+
+                old_mesh = obj.data
+                mesh_name = old_mesh.name
+                old_mesh.name = mesh_name + ".old"
+                obj.data = create_mesh(mesh_name, bes_mesh, bpy_mat, bes_mat,
+                                       bool(info["normals"]), bool(info["uv"]))
+                if old_mesh.users == 0:
+                    bpy.data.meshes.remove(old_mesh)
+
+                info["hash"] = bes_mesh.hash()
+                updated += 1
+
+            transform = object_transform(bes_obj)
+            if list(info["transform"]) != transform:
+                obj.location = bes_obj.translation
+                obj.rotation_euler = Euler(bes_obj.rotation, 'XYZ')
+                obj.scale = bes_obj.scale
+
+                info["transform"] = transform
+                updated += 1
+
+    return updated
+
+def load_textures(bpy_mat, bes_mat, tex_index, ext_ignore, uv_channels, proxy_size = 0,
+                  prefix = None, textures = None):
+    """
+    Add texture slots of BES material into Blender material, return names of textures not found.
+    Texture slots use UV layers given by 'uv_channels' (see shared_uv_channels).
+    With 'proxy_size', images are downscaled to that size (see load_image).
+    Texture names get 'prefix', and textures are shared by materials through 'textures' dict.
+    """
+    missing = []
+    for idx, tex in enumerate(bes_mat.textures):
+        tex_file = tex.file_name
+        tex_key = tex_file.upper()
+
+        # Texture of the same file was already created for another material
+        if textures is not None and tex_key in textures:
+            (bpy_tex, found) = textures[tex_key]
+            if not found:
+                missing.append(tex_file)
+            add_texture_slot(bpy_mat, bpy_tex, tex, uv_channels[idx])
+            continue
+
+        tex_name = os.path.splitext(tex_file)[0]
+        if prefix is not None:
+            tex_name = "{}:{}".format(prefix, tex_name)
+        bpy_tex = bpy.data.textures.new(tex_name, 'IMAGE')
+        bpy_tex["bes_file"] = tex_key
+        tex_paths = []
+
+        # Search for files with any extension supported by
+        # PteroEngine (which is BESMaterial.TexExtensions) if users
+        # chose to ignore extensions
+        tex_exts = BESMaterial.TexExtensions if ext_ignore else []
+
+        # Since Vietcong is Windows game, we need to work with texture name as
+        # case insensitive. On top of that, the user has a possibility to choose
+        # directories where textures may be located
+        tex_paths.extend(tex_index.find(tex_file, tex_exts))
+
+        # Try to load image from file
+        if len(tex_paths) != 0:
+            # Sort found textures by extension (PteroEngine requires following
+            # priority: dds, tga, bmp)
+            tex_paths.sort(key=functools.cmp_to_key(sort_ext))
+
+            # Simply choose any texture with extension of the highest priority
+            tex_path = ".".join(tex_paths[0])
+            bpy_tex.image = load_image(tex_path, proxy_size)
+        else:
+            missing.append(tex_file)
+
+        if textures is not None:
+            textures[tex_key] = (bpy_tex, len(tex_paths) != 0)
+        add_texture_slot(bpy_mat, bpy_tex, tex, uv_channels[idx])
+
+    return missing
+
+def add_texture_slot(bpy_mat, bpy_tex, tex, uv_channel):
+    slot = bpy_mat.texture_slots.add()
+    slot.texture = bpy_tex
+    slot.use_map_alpha = tex.use_alpha
+    slot.alpha_factor = 1.0 if tex.use_alpha else slot.alpha_factor
+    slot.blend_type = tex.blend_type
+    slot.uv_layer = "{}-{}.uv".format(bpy_mat.name, uv_channel)
+
+def texture_proxy_dir():
+    try:
+        return bpy.utils.user_resource('CONFIG', "bes_texture_proxies", True)
+    except Exception:
+        return None
+
+def load_image(path, proxy_size = 0):
+    """
+    Load image from file. If 'proxy_size' is given, load its version downscaled to fit into
+    'proxy_size' pixels instead. Downscaled images are cached on disk by path and mtime of
+    original image and remember original path, so they can be switched back.
+    """
+    cache_dir = texture_proxy_dir() if proxy_size else None
+    if not cache_dir:
+        return bpy.data.images.load(path)
+
+    stat = os.stat(path)
+    key = "{}:{}:{}".format(path, stat.st_mtime, stat.st_size).encode("utf-8", "surrogateescape")
+    proxy_path = os.path.join(cache_dir, "{}_{}.png".format(hashlib.md5(key).hexdigest(), proxy_size))
+
+    if not os.path.isfile(proxy_path):
+        image = bpy.data.images.load(path)
+        (width, height) = image.size
+
+        # Small images are used as they are
+        if max(width, height) <= proxy_size:
+            return image
+
+        scale = proxy_size / max(width, height)
+        image.scale(max(1, int(width * scale)), max(1, int(height * scale)))
+        image.filepath_raw = proxy_path
+        image.file_format = 'PNG'
+        image.save()
+        bpy.data.images.remove(image)
+
+    image = bpy.data.images.load(proxy_path)
+    image.name = os.path.basename(path)
+    image["bes_full_path"] = path
+    return image
+
+class BESFullTextures(bpy.types.Operator):
+    bl_idname = "image.bes_full_resolution"
+    bl_label = "Full Resolution Textures"
+    bl_description = "Replace all downscaled texture proxies by original images"
+
+    @classmethod
+    def poll(self, context):
+        return any("bes_full_path" in image for image in bpy.data.images)
+
+    def execute(self, context):
+        for image in bpy.data.images:
+            if "bes_full_path" in image:
+                image.filepath = image["bes_full_path"]
+                image.reload()
+                del image["bes_full_path"]
+
+        return {'FINISHED'}
 
-def get_case_insensitive_path(dirname, tex, tex_exts = []):
+def fill_mesh(bpy_mesh, coords, faces):
+    """ Fill empty Blender mesh by numpy arrays of vertex coords (N, 3) and triangles (M, 3) """
+    face_cnt = len(faces)
+    bpy_mesh.vertices.add(len(coords))
+    bpy_mesh.vertices.foreach_set("co", coords.ravel())
+    bpy_mesh.loops.add(face_cnt * 3)
+    bpy_mesh.loops.foreach_set("vertex_index", faces.ravel().astype(numpy.int32, copy=False))
+    bpy_mesh.polygons.add(face_cnt)
+    bpy_mesh.polygons.foreach_set("loop_start", numpy.arange(0, face_cnt * 3, 3, dtype=numpy.int32))
+    bpy_mesh.polygons.foreach_set("loop_total", numpy.full(face_cnt, 3, dtype=numpy.int32))
+    bpy_mesh.update(calc_edges = True)
+
+def shared_uv_channels(bes_root):
+    """
+    Return list for every material of root object, which maps material textures to UV channels.
+    Texture whose UV coords are identical to those of previous texture in all meshes
+    using the material is mapped to UV channel of that previous texture. Previous textures
+    with the same 'coord' value are compared first.
+    """
+    meshes = dict()
+    for bes_obj in bes_root.walk():
+        for bes_mesh in bes_obj.meshes:
+            # Meshes without geometry or UV coords (skipped by import mode) do not matter
+            if bes_mesh.vertices is not None and bes_mesh.vertices["uv"].shape[1] > 0:
+                meshes.setdefault(bes_mesh.material, []).append(bes_mesh.vertices["uv"])
+
+    uv_channels = []
+    for mat_id, bes_mat in enumerate(bes_root.materials):
+        channels = list(range(len(bes_mat.textures)))
+        mat_uvs = meshes.get(mat_id, [])
+
+        if len(mat_uvs) > 0 and all(uv.shape[1] >= len(channels) for uv in mat_uvs):
+            for idx in channels:
+                # Textures sharing 'coord' are tried first, the rest only when hint does not hold
+                hinted = [prev for prev in range(idx)
+                          if bes_mat.textures[prev].coord == bes_mat.textures[idx].coord]
+                others = [prev for prev in range(idx) if prev not in hinted]
+                for prev in hinted + others:
+                    if channels[prev] == prev and \
+                            all(numpy.array_equal(uv[:, idx], uv[:, prev]) for uv in mat_uvs):
+                        channels[idx] = prev
+                        break
+        uv_channels.append(channels)
+
+    return uv_channels
+
+def merge_meshes(parts, material, tex_cnt):
     """
-    Returns list of found files. Each file is a tuple of (full path, extension)
+    Merge list of (world matrix, BESMesh) into single BESMesh with transformations
+    baked into vertex coords and normals. First 'tex_cnt' UV coords are kept.
     """
-    file_paths = []
-    tex_name = os.path.splitext(tex)[0].upper()
+    vert_cnt = sum(len(bes_mesh.vertices) for (_, bes_mesh) in parts)
+    face_cnt = sum(len(bes_mesh.faces) for (_, bes_mesh) in parts)
+    vertices = numpy.zeros(vert_cnt, dtype=BESVertex.dtype(24 + 8 * tex_cnt, tex_cnt))
+    faces = numpy.empty((face_cnt, 3), dtype=numpy.int32)
+
+    vert_start = 0
+    face_start = 0
+    for (matrix, bes_mesh) in parts:
+        vert_end = vert_start + len(bes_mesh.vertices)
+        face_end = face_start + len(bes_mesh.faces)
+
+        # Normals are transformed by inverse transpose, so they stay perpendicular under scale
+        linear = matrix[:3, :3]
+        normals = bes_mesh.vertices["normals"].dot(numpy.linalg.pinv(linear))
+        lengths = numpy.linalg.norm(normals, axis=1)
+        lengths[lengths == 0.0] = 1.0
+
+        vertices["coords"][vert_start:vert_end] = bes_mesh.vertices["coords"].dot(linear.T) + matrix[:3, 3]
+        vertices["normals"][vert_start:vert_end] = normals / lengths[:, numpy.newaxis]
+        uv_cnt = min(tex_cnt, bes_mesh.vertices["uv"].shape[1])
+        vertices["uv"][vert_start:vert_end, :uv_cnt] = bes_mesh.vertices["uv"][:, :uv_cnt]
+        faces[face_start:face_end] = bes_mesh.faces + vert_start
+
+        vert_start = vert_end
+        face_start = face_end
+
+    return BESMesh(vertices, faces, material)
+
+def create_mesh(name, bes_mesh, bpy_mat, bes_mat, use_normals, use_uv):
+    """ Create Blender mesh from BESMesh with its material and UV mapping """
+    bpy_mesh = bpy.data.meshes.new(name)
+    fill_mesh(bpy_mesh, bes_mesh.vertices["coords"], bes_mesh.faces)
+
+    # Use BES normals instead of normals computed by Blender
+    if use_normals:
+        bpy_mesh.polygons.foreach_set("use_smooth", numpy.ones(len(bes_mesh.faces), dtype=bool))
+        bpy_mesh.use_auto_smooth = True
+        bpy_mesh.normals_split_custom_set_from_vertices(bes_mesh.vertices["normals"])
+
+    # Assign material to mesh
+    if bpy_mat is None:
+        return bpy_mesh
+    bpy_mesh.materials.append(bpy_mat)
+
+    # UV coords were not decoded by parser
+    if not use_uv:
+        return bpy_mesh
+
+    # Textures with identical UV coords share single UV layer (see shared_uv_channels)
+    uv_channels = bpy_mat.get("bes_uv_channels", range(len(bes_mat.textures)))
+
+    # Create uv_texture for every distinct UV channel used by material textures
+    # and update its uv data for all loops (loops follow faces order)
+    loop_verts = bes_mesh.faces.ravel()
+    for channel in sorted(set(uv_channels)):
+        uvtex = bpy_mesh.uv_textures.new()
+        uvtex.name = "{}-{}.uv".format(bpy_mat.name, channel)
+        uvtex.active = True
+        uvlayer = bpy_mesh.uv_layers[uvtex.name]
+
+        uv = bes_mesh.vertices["uv"][loop_verts, channel]
+        uv[:, 1] = 1.0 - uv[:, 1] # Convert UV coords from BES to Blender
+        uvlayer.data.foreach_set("uv", uv.ravel())
+
+    return bpy_mesh
+
+# Triangles of box made of 8 corners, where corner index bits mean max x, y and z
+box_faces = numpy.array([[0, 2, 3], [0, 3, 1], [4, 5, 7], [4, 7, 6],
+                         [0, 1, 5], [0, 5, 4], [2, 6, 7], [2, 7, 3],
+                         [0, 4, 6], [0, 6, 2], [1, 3, 7], [1, 7, 5]], dtype=numpy.uint32)
+
+def bounding_box(coords):
+    """ Return (coords, faces) of axis aligned box around given vertex coords """
+    (lo, hi) = (coords.min(axis=0), coords.max(axis=0))
+    corners = numpy.array([[hi[0] if idx & 1 else lo[0],
+                            hi[1] if idx & 2 else lo[1],
+                            hi[2] if idx & 4 else lo[2]] for idx in range(8)], dtype=numpy.float32)
+    return (corners, box_faces)
+
+def decimate(coords, faces, ratio):
+    """
+    Return (coords, faces) of mesh simplified by vertex clustering. Vertices are merged
+    within cells of regular grid sized to keep about 'ratio' of them, faces which
+    collapsed or became duplicate are removed.
+    """
+    (lo, hi) = (coords.min(axis=0), coords.max(axis=0))
+    cells = max(1, int(numpy.ceil(numpy.sqrt(len(coords) * ratio))))
+    cell_size = (hi - lo) / cells
+    cell_size[cell_size == 0.0] = 1.0
+
+    # Find cell of every vertex and merge vertices of the same cell into their mean
+    cell = numpy.minimum(((coords - lo) / cell_size).astype(numpy.int64), cells - 1)
+    cell_key = (cell[:, 0] * cells + cell[:, 1]) * cells + cell[:, 2]
+    (keys, remap) = numpy.unique(cell_key, return_inverse=True)
+    counts = numpy.bincount(remap)
+    new_coords = numpy.empty((len(keys), 3), dtype=numpy.float32)
+    for axis in range(3):
+        new_coords[:, axis] = numpy.bincount(remap, weights=coords[:, axis]) / counts
+
+    # Remove collapsed and duplicate faces
+    new_faces = remap[faces]
+    new_faces = new_faces[(new_faces[:, 0] != new_faces[:, 1]) &
+                          (new_faces[:, 1] != new_faces[:, 2]) &
+                          (new_faces[:, 0] != new_faces[:, 2])]
+    (_, unique_idx) = numpy.unique(numpy.sort(new_faces, axis=1), axis=0, return_index=True)
+    new_faces = new_faces[numpy.sort(unique_idx)]
+
+    return (new_coords, new_faces)
+
+def transform_bounds(bounds, matrix):
+    """ Return axis aligned bounds of box 'bounds' transformed by 4x4 'matrix' """
+    center = matrix[:3, :3].dot((bounds[0] + bounds[1]) / 2) + matrix[:3, 3]
+    extent = numpy.abs(matrix[:3, :3]).dot((bounds[1] - bounds[0]) / 2)
+    return numpy.array([center - extent, center + extent])
+
+def union_bounds(boxes):
+    """ Return bounds enclosing all given bounds (None if there are none) """
+    if not boxes:
+        return None
+    boxes = numpy.array(boxes)
+    return numpy.array([boxes[:, 0].min(axis=0), boxes[:, 1].max(axis=0)])
+
+def bounds_outside(bounds, region):
+    """ Return True if bounds do not intersect region (unknown bounds are never outside) """
+    if bounds is None:
+        return False
+    return bool(numpy.any(bounds[1] < region[0]) or numpy.any(bounds[0] > region[1]))
+
+def bounds_cache_path(path):
+    try:
+        cache_dir = bpy.utils.user_resource('CONFIG', "bes_bounds", True)
+    except Exception:
+        return None
+    key = hashlib.md5(path.encode("utf-8", "surrogateescape")).hexdigest()
+    return os.path.join(cache_dir, key + ".json")
+
+def load_bounds_cache(path):
+    """ Return mesh bounds of BES file cached on disk, or None if file changed since then """
+    cache_path = bounds_cache_path(path)
+    try:
+        with open(cache_path, "r") as f:
+            cache = json.load(f)
+        if cache["file"] == path and cache["stamp"] == file_stamp(path):
+            return cache["meshes"]
+    except (TypeError, OSError, ValueError, KeyError):
+        pass
+    return None
+
+def save_bounds_cache(path, bounds):
+    cache_path = bounds_cache_path(path)
+    if not cache_path:
+        return
+    try:
+        cache = {"file": path, "stamp": file_stamp(path), "meshes": bounds}
+        with open(cache_path + ".tmp", "w") as f:
+            json.dump(cache, f)
+        os.replace(cache_path + ".tmp", cache_path)
+    except OSError:
+        pass
 
-    # If there are not given required extensions, we will take one from texture name
-    if len(tex_exts) == 0:
-        tex_exts.append(os.path.splitext(tex)[1].strip('.').upper())
+def create_proxy_mesh(name, bes_mesh, bpy_mat, proxy_mode, ratio):
+    """ Create low detail Blender mesh from BESMesh (either its bounding box or decimated mesh) """
+    coords = bes_mesh.vertices["coords"]
+    faces = bes_mesh.faces
+    if len(coords) > 0:
+        if proxy_mode == 'BOUNDS':
+            (coords, faces) = bounding_box(coords)
+        elif ratio < 1.0:
+            (coords, faces) = decimate(coords, faces, ratio)
 
-    for dir_file in os.listdir(dirname):
-        (f_name, f_ext) = os.path.splitext(dir_file)
-        f_ext = f_ext.strip(".")
+    bpy_mesh = bpy.data.meshes.new(name)
+    fill_mesh(bpy_mesh, coords, faces)
+    if bpy_mat is not None:
+        bpy_mesh.materials.append(bpy_mat)
 
-        if f_name.upper() == tex_name and f_ext.upper() in tex_exts:
-            file_paths.append((os.path.join(dirname, f_name), f_ext))
+    return bpy_mesh
 
-    return file_paths
+class TextureIndex(object):
+    """
+    Index of files in directories where textures are searched for.
+    Listing of every search root is stored on disk and on next import only
+    directories whose modification time changed are listed again.
+    """
+    version = 1
+
+    def __init__(self):
+        # Upper-case file name without extension -> list of (full path without extension, extension)
+        self.files = dict()
+        # Real paths of directories already added into index
+        self.dirs = set()
+
+        try:
+            self.cache_dir = bpy.utils.user_resource('CONFIG', "bes_texture_index", True)
+        except Exception:
+            self.cache_dir = None
+
+    def cache_path(self, root):
+        if not self.cache_dir:
+            return None
+        key = hashlib.md5(root.encode("utf-8", "surrogateescape")).hexdigest()
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def load(self, root):
+        """ Return cached listings of root directory, or empty dict if there are none """
+        path = self.cache_path(root)
+        try:
+            with open(path, "r") as f:
+                cache = json.load(f)
+            if cache["version"] == TextureIndex.version and cache["root"] == root:
+                return cache["dirs"]
+        except (TypeError, OSError, ValueError, KeyError):
+            pass
+        return dict()
+
+    def save(self, root, dirs):
+        path = self.cache_path(root)
+        if not path:
+            return
+        try:
+            with open(path + ".tmp", "w") as f:
+                json.dump({"version": TextureIndex.version, "root": root, "dirs": dirs}, f)
+            os.replace(path + ".tmp", path)
+        except OSError:
+            pass
+
+    def list_dir(self, path, cached):
+        """
+        Return listing of directory as dict with its mtime, files ([name, ext] pairs)
+        and subdirectories. Directory is listed only if it changed since it was cached.
+        """
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+
+        listing = cached.get(path)
+        if listing is not None and listing["mtime"] == mtime:
+            return listing
+
+        files = []
+        dirs = []
+        try:
+            for entry in os.scandir(path):
+                if entry.is_dir():
+                    dirs.append(entry.name)
+                else:
+                    (f_name, f_ext) = os.path.splitext(entry.name)
+                    files.append([f_name, f_ext.strip(".")])
+        except OSError:
+            return None
+
+        return {"mtime": mtime, "files": files, "dirs": dirs}
+
+    def add_root(self, root, recursive):
+        """ Add files of root directory (and all its subdirectories if 'recursive') into index """
+        root = os.path.normpath(os.path.abspath(root))
+        cached = self.load(root)
+        visited = dict()
+        # Symlinked directories are followed, but every real directory is listed only once,
+        # so links to ancestors do not loop
+        real_paths = set()
+
+        pending = [root]
+        while pending:
+            path = pending.pop()
+            real_path = os.path.realpath(path)
+            if real_path in real_paths:
+                continue
+            real_paths.add(real_path)
+
+            listing = self.list_dir(path, cached)
+            if listing is None:
+                continue
+            visited[path] = listing
+
+            if real_path not in self.dirs:
+                self.dirs.add(real_path)
+                for (f_name, f_ext) in listing["files"]:
+                    self.files.setdefault(f_name.upper(), []).append((os.path.join(path, f_name), f_ext))
+
+            if recursive:
+                # Reversed, so subdirectories are visited in listing order
+                pending.extend(os.path.join(path, d) for d in reversed(listing["dirs"]))
+
+        # Listings of subdirectories are kept when root is searched non-recursively
+        if recursive:
+            dirs = visited
+        else:
+            dirs = dict(cached)
+            dirs.update(visited)
+
+        if dirs != cached:
+            self.save(root, dirs)
+
+    def find(self, tex, tex_exts = []):
+        """
+        Returns list of found files. Each file is a tuple of (full path, extension)
+        """
+        (tex_name, tex_ext) = os.path.splitext(tex)
+
+        # If there are not given required extensions, we will take one from texture name
+        if len(tex_exts) == 0:
+            tex_exts = [tex_ext.strip('.').upper()]
+
+        return [(path, f_ext) for (path, f_ext) in self.files.get(tex_name.upper(), [])
+                if f_ext.upper() in tex_exts]
 
 def sort_ext(a, b):
     """
@@ -805,6 +2300,123 @@ def sort_ext(a, b):
     else:
         return 0
 
+# Preview collections used by BES browser, created in register()
+preview_collections = {}
+
+def get_bes_preview(pcoll, filepath):
+    """
+    Return preview of given BES file from preview collection.
+    Preview is loaded only once and reloaded after BES file is modified.
+    """
+    try:
+        mtime = os.path.getmtime(filepath)
+    except OSError:
+        mtime = None
+    if filepath in pcoll and pcoll.bes_mtimes.get(filepath) == mtime:
+        return pcoll[filepath]
+
+    preview = pcoll[filepath] if filepath in pcoll else pcoll.new(filepath)
+    try:
+        # Read only header and preview, model data are not needed for thumbnail
+        bes = BES(filepath, preview_only = True)
+        preview.image_size = (BESPreview.width, BESPreview.height)
+        preview.image_pixels_float = bes.preview.rgba()
+    except (BESError, OSError):
+        pass
+    pcoll.bes_mtimes[filepath] = mtime
+
+    return preview
+
+def enum_bes_previews(self, context):
+    """ Fill BES browser with thumbnails of all BES files in chosen directory """
+    pcoll = preview_collections["browser"]
+    directory = bpy.path.abspath(self.directory)
+
+    # Enum items are requested on every redraw, so list directory only when it changes
+    if directory == pcoll.bes_dir:
+        return pcoll.bes_items
+
+    items = []
+    if os.path.isdir(directory):
+        bes_files = sorted(entry.name for entry in os.scandir(directory)
+                           if entry.is_file() and entry.name.lower().endswith(".bes"))
+        for idx, name in enumerate(bes_files):
+            preview = get_bes_preview(pcoll, os.path.join(directory, name))
+            items.append((name, name, "", preview.icon_id, idx))
+
+    pcoll.bes_dir = directory
+    pcoll.bes_items = items
+    return items
+
+class BESBrowserProperties(bpy.types.PropertyGroup):
+    directory = StringProperty(
+            name="Directory",
+            description="Directory with BES files to browse",
+            subtype='DIR_PATH',
+            )
+
+    preview = EnumProperty(
+            name="BES file",
+            items=enum_bes_previews,
+            )
+
+class BESBrowserRefresh(bpy.types.Operator):
+    bl_idname = "import_mesh.bes_browser_refresh"
+    bl_label = "Refresh BES Browser"
+
+    def execute(self, context):
+        # Force enum_bes_previews to list directory again
+        preview_collections["browser"].bes_dir = ""
+        return {'FINISHED'}
+
+class BESBrowserImport(bpy.types.Operator):
+    bl_idname = "import_mesh.bes_browser_import"
+    bl_label = "Import BES"
+
+    @classmethod
+    def poll(self, context):
+        return context.window_manager.bes_browser.preview != ""
+
+    def execute(self, context):
+        browser = context.window_manager.bes_browser
+        directory = bpy.path.abspath(browser.directory)
+        bpy.ops.import_mesh.bes(filepath=os.path.join(directory, browser.preview),
+                                directory=directory,
+                                files=[{"name": browser.preview}])
+
+        return {'FINISHED'}
+
+class BESBrowserPanel(bpy.types.Panel):
+    bl_idname = "VIEW3D_PT_bes_browser"
+    bl_label = "BES Browser"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'TOOLS'
+    bl_category = "BES"
+
+    def draw(self, context):
+        browser = context.window_manager.bes_browser
+
+        layout = self.layout
+        row = layout.row(True)
+        row.prop(browser, "directory", text="")
+        row.operator(BESBrowserRefresh.bl_idname, icon='FILE_REFRESH', text="")
+
+        layout.template_icon_view(browser, "preview", show_labels=True)
+        layout.label(browser.preview)
+        layout.operator(BESBrowserImport.bl_idname, icon='IMPORT')
+
+        layout.separator()
+        layout.operator(BESFullDetail.bl_idname, icon='MESH_DATA')
+        layout.operator(BESFullTextures.bl_idname, icon='IMAGE_DATA')
+        layout.operator(BESReload.bl_idname, icon='FILE_REFRESH')
+        layout.operator(BESWatch.bl_idname, icon='TIME',
+                        text="Stop Watching BES Files" if BESWatch.running else "Watch BES Files")
+
+        layout.separator()
+        layout.label("Cached: {} files, {:.1f} MB".format(len(bes_cache.items), bes_cache.size / 2**20))
+        layout.label("Hits: {}, misses: {}".format(bes_cache.hits, bes_cache.misses))
+        layout.operator(BESClearCache.bl_idname, icon='X')
+
 def menu_import_bes(self, context):
     self.layout.operator(BESImporter.bl_idname, text="BES (.bes)")
 
@@ -812,7 +2424,20 @@ def register():
     bpy.utils.register_module(__name__)
     bpy.types.INFO_MT_file_import.append(menu_import_bes)
 
+    pcoll = bpy.utils.previews.new()
+    pcoll.bes_dir = ""
+    pcoll.bes_items = []
+    pcoll.bes_mtimes = {}
+    preview_collections["browser"] = pcoll
+    bpy.types.WindowManager.bes_browser = PointerProperty(type=BESBrowserProperties)
+
 def unregister():
+    bes_cache.clear()
+    del bpy.types.WindowManager.bes_browser
+    for pcoll in preview_collections.values():
+        bpy.utils.previews.remove(pcoll)
+    preview_collections.clear()
+
     bpy.utils.unregister_module(__name__)
     bpy.types.INFO_MT_file_import.remove(menu_import_bes)
 
@@ -30,12 +30,36 @@ bl_info = {
     "category"   : "Material",
 }
 
-def update_material_view(context):
-    material = context.active_object.active_material
-    if "bes_props" in material and "type" in material["bes_props"] and \
-            material["bes_props"]["type"] == "pteromat" and \
-            "transparency" in material["bes_props"] and \
-            material["bes_props"]["transparency"] != "none":
+# Enum items of collision materials, index 0 means no collision material
+collision_items = [("none", "- NONE -", "")] + \
+                  [(collision, collision, "") for collision in pterocolmat.ptero_colls]
+
+def collision_enum_index(code):
+    """ Return index of collision material code in collision_items (0 if code is unknown) """
+    idx = pterocolmat.ptero_colls_index.get(code)
+    return 0 if idx is None else idx + 1
+
+transparency_items = [
+    ("none", "- none - (opaque)", ""),
+    ("#0",   "#0 - transparent, zbufwrite, sort", ""),
+    ("#1",   "#1 - transparent, zbufwrite, sort, 1-bit alpha", ""),
+    ("#2",   "#2 - translucent, no_zbufwrite, sort", ""),
+    ("#3",   "#3 - transparent, zbufwrite, nosort, 1-bit alpha", ""),
+    ("#4",   "#4 - translucent, add with background, no_zbufwrite, sort", ""),
+]
+
+# Set while many materials are edited at once, view is then updated only once at the end
+view_update_locked = False
+
+def get_bes_props(material):
+    if "bes_props" not in material:
+        material["bes_props"] = dict()
+    return material["bes_props"]
+
+def update_material_view(material):
+    props = material.get("bes_props")
+    if props is not None and props.get("type") == "pteromat" and \
+            props.get("transparency", "none") != "none":
         material.use_transparency = True
         material.alpha = 0.0
     else:
@@ -43,19 +67,19 @@ def update_material_view(context):
         material.alpha = 1.0
 
 def update_material_type(self, context):
-    material = context.active_object.active_material
-    if "bes_props" not in material:
-        material["bes_props"] = dict()
+    material = self.id_data
+    get_bes_props(material)["type"] = self.material_type
+    if not view_update_locked:
+        update_material_view(material)
 
-    material["bes_props"]["type"] = self.material_type
-    update_material_view(context)
+def update_collision_type(self, context):
+    get_bes_props(self.id_data)["collision"] = self.pteromat_collision
 
 def update_transparency_type(self, context):
-    material = context.active_object.active_material
-    if "bes_props" not in material:
-        material["bes_props"] = dict()
-    material["bes_props"]["transparency"] = self.pteromat_transparency
-    update_material_view(context)
+    material = self.id_data
+    get_bes_props(material)["transparency"] = self.pteromat_transparency
+    if not view_update_locked:
+        update_material_view(material)
 
 class BESMaterialProperties(bpy.types.PropertyGroup):
     material_type = bpy.props.EnumProperty(
@@ -71,24 +95,88 @@ class BESMaterialProperties(bpy.types.PropertyGroup):
     pteromat_collision = bpy.props.EnumProperty(
         name = "Collision Material",
         description = "PteroMat collision material",
-        items = [("none", "- NONE -", "")] +
-                ([(collision, collision, "") for collision in pterocolmat.ptero_colls]),
+        items = collision_items,
+        update=update_collision_type
     )
 
     pteromat_transparency = bpy.props.EnumProperty(
         name = "Type of transparent",
         description = "PteroMat transparency type",
+        items = transparency_items,
+        update=update_transparency_type
+    )
+
+class BESMaterialBatch(bpy.types.Operator):
+    bl_idname = "material.bes_batch"
+    bl_label = "Edit Selected Materials"
+    bl_description = "Set BES properties of all materials of selected objects at once"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    apply_type = bpy.props.BoolProperty(name = "Set material type", default = True)
+    material_type = bpy.props.EnumProperty(
+        name = "Material",
+        description = "BES material type",
         items = [
-            ("none", "- none - (opaque)", ""),
-            ("#0",   "#0 - transparent, zbufwrite, sort", ""),
-            ("#1",   "#1 - transparent, zbufwrite, sort, 1-bit alpha", ""),
-            ("#2",   "#2 - translucent, no_zbufwrite, sort", ""),
-            ("#3",   "#3 - transparent, zbufwrite, nosort, 1-bit alpha", ""),
-            ("#4",   "#4 - translucent, add with background, no_zbufwrite, sort", ""),
+            ("standard", "Standard", "Standard 3DS Max texturing material"),
+            ("pteromat", "PteroMat", "Ptero-Engine II Material"),
         ],
-        update=update_transparency_type
     )
 
+    apply_collision = bpy.props.BoolProperty(name = "Set collision material", default = False)
+    pteromat_collision = bpy.props.EnumProperty(
+        name = "Collision Material",
+        description = "PteroMat collision material",
+        items = collision_items,
+    )
+
+    apply_transparency = bpy.props.BoolProperty(name = "Set transparency", default = False)
+    pteromat_transparency = bpy.props.EnumProperty(
+        name = "Type of transparent",
+        description = "PteroMat transparency type",
+        items = transparency_items,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return len(context.selected_objects) > 0
+
+    def invoke(self, context, event):
+        # Start with values of active material
+        material = context.active_object.active_material if context.active_object else None
+        props = material.get("bes_props") if material else None
+        if props is not None:
+            self.material_type = props.get("type", "standard")
+            self.pteromat_collision = collision_items[collision_enum_index(props.get("collision"))][0]
+            self.pteromat_transparency = props.get("transparency", "none")
+
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        global view_update_locked
+
+        # Every material is edited only once, even if it is shared by many objects
+        materials = {slot.material for obj in context.selected_objects
+                     for slot in obj.material_slots if slot.material}
+
+        view_update_locked = True
+        try:
+            for material in materials:
+                panel = material.bes_mat_panel
+                if self.apply_type:
+                    panel.material_type = self.material_type
+                if self.apply_collision:
+                    panel.pteromat_collision = self.pteromat_collision
+                if self.apply_transparency:
+                    panel.pteromat_transparency = self.pteromat_transparency
+        finally:
+            view_update_locked = False
+
+        for material in materials:
+            update_material_view(material)
+
+        self.report({'INFO'}, "{} materials updated".format(len(materials)))
+        return {'FINISHED'}
+
 class BESMaterialPanel(bpy.types.Panel):
     bl_idname = "material.bes"
     bl_label = "BES Materials"
@@ -105,6 +193,7 @@ class BESMaterialPanel(bpy.types.Panel):
 
         layout = self.layout
         layout.prop(material.bes_mat_panel, "material_type")
+        layout.operator(BESMaterialBatch.bl_idname, icon='MATERIAL')
 
         if "bes_props" in material and "type" in material["bes_props"] and \
             material["bes_props"]["type"] == "pteromat":
@@ -139,10 +228,12 @@ class BESMaterialPanel(bpy.types.Panel):
 def register():
     bpy.utils.register_class(BESMaterialPanel)
     bpy.utils.register_class(BESMaterialProperties)
+    bpy.utils.register_class(BESMaterialBatch)
     bpy.types.Material.bes_mat_panel = bpy.props.PointerProperty(type=BESMaterialProperties)
 
 def unregister():
     del bpy.types.Material.bes_mat_panel
+    bpy.utils.unregister_class(BESMaterialBatch)
     bpy.utils.unregister_class(BESMaterialProperties)
     bpy.utils.unregister_class(BESMaterialPanel)
 
@@ -113,3 +113,6 @@ ptero_colls = [
     'ZL',
     'ZK',
 ]
+
+# Cached lookup of collision material code -> its index in ptero_colls
+ptero_colls_index = {coll: idx for idx, coll in enumerate(ptero_colls)}